@@ -0,0 +1,3 @@
+"""
+benchmarks: timing scripts for the blueprint application
+"""
@@ -0,0 +1,86 @@
+"""
+benchmarks/bench_charts.py: build and draw times of the chart views
+
+    -LineChartView construction against row and series counts
+    -YieldChartView.draw_scatter against point count
+"""
+
+import tkinter as tk
+
+import numpy as np
+
+from blueprint import views as v
+
+from .common import measure
+
+
+def _nodes(rows, series):
+    """Line chart rows split evenly over series, as in myModel.nodes()"""
+    per_series = rows // series
+    return [
+        {'Day': day, 'lab_id': f'L{s}', 'Average Height (cm)': height}
+        for s in range(series)
+        for day, height in enumerate(
+            np.random.default_rng(s).random(per_series).tolist())
+    ]
+
+
+def bench_line_chart(root, rows, series, repeat):
+    data = _nodes(rows, series)
+
+    def build():
+        chart = v.LineChartView(
+            root, data, (800, 400),
+            'Day', 'Average Height (cm)', 'lab_id'
+        )
+        chart.update_idletasks()
+        return chart
+
+    return measure(
+        build, repeat, params={'rows': rows, 'series': series},
+        teardown=lambda chart: chart.destroy()
+    )
+
+
+def bench_scatter(root, points, repeat):
+    rng = np.random.default_rng(0)
+    data = list(zip(
+        rng.uniform(25, 28, points).tolist(),
+        rng.uniform(23, 24, points).tolist(),
+        rng.integers(5, 50, points).tolist()
+    ))
+
+    def setup():
+        chart = v.YieldChartView(root, 'humidity', 'temperature', 'yield')
+        chart.update_idletasks()
+        return chart
+
+    def draw(chart):
+        chart.draw_scatter(data, 'blue', 'seed')
+        chart.canvas_tkagg.draw()
+        return chart
+
+    return measure(
+        draw, repeat, setup=setup, params={'points': points},
+        teardown=lambda chart: chart.destroy()
+    )
+
+
+def run(quick=False):
+    repeat = 3 if quick else 5
+    row_counts = [1000, 100000] if quick else [1000, 10000, 100000, 1000000]
+    point_counts = [100, 10000] if quick else [100, 1000, 10000, 100000]
+
+    root = tk.Tk()
+    results = {}
+    try:
+        for rows in row_counts:
+            for series in (1, 7, 500):
+                results[f'line_chart.build.rows={rows}.series={series}'] = (
+                    bench_line_chart(root, rows, series, repeat))
+        for points in point_counts:
+            results[f'yield_chart.draw_scatter.points={points}'] = (
+                bench_scatter(root, points, repeat))
+    finally:
+        root.destroy()
+    return results
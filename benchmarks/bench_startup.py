@@ -0,0 +1,107 @@
+"""
+benchmarks/bench_startup.py: cold-start time of the Application
+
+Each run starts a fresh interpreter, so imports are paid every time.
+Three times are recorded from process launch:
+
+    -imported: blueprint.application is imported
+    -window: the root window is first mapped
+    -charts: the example charts are built (<<ChartsReady>>)
+
+Needs a display; on a headless box run it under Xvfb:
+
+    xvfb-run python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from .common import require_display
+
+# cold-start budget in seconds, per milestone
+BUDGET = {
+    'imported': 0.5,
+    'window': 1.0,
+    'charts': 3.0
+}
+# seconds before a start that never reaches <<ChartsReady>> is killed
+TIMEOUT = 60
+
+
+def _child():
+    """Start the application, record milestones and quit"""
+    marks = {}
+    from blueprint.application import Application
+    marks['imported'] = time.time()
+
+    app = Application()
+
+    def on_map(event):
+        if event.widget is app:
+            marks.setdefault('window', time.time())
+
+    def on_charts(_):
+        marks['charts'] = time.time()
+        app.after_idle(app.destroy)
+
+    app.bind('<Map>', on_map, add='+')
+    app.bind('<<ChartsReady>>', on_charts, add='+')
+    app.mainloop()
+    print(json.dumps(marks))
+
+
+def measure():
+    """Time one cold start; return seconds to each milestone"""
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_startup', '--child'],
+        check=True, capture_output=True, text=True, timeout=TIMEOUT
+    ).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {key: mark - start for key, mark in marks.items()}
+
+
+def run(quick=False, runs=None):
+    """Time several cold starts; return stats per milestone"""
+    runs = runs or (3 if quick else 5)
+    samples = [measure() for _ in range(runs)]
+    results = {}
+    for key in BUDGET:
+        times = [sample[key] for sample in samples]
+        results[f'startup.{key}'] = {
+            'median': statistics.median(times),
+            'min': min(times),
+            'max': max(times),
+            'repeat': runs,
+            'params': {'budget': BUDGET[key]}
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the cold-start time of the Application')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child()
+        return 0
+
+    require_display()
+    results = run(runs=args.runs)
+    over = False
+    for key in BUDGET:
+        seconds = results[f'startup.{key}']['median']
+        status = 'ok' if seconds <= BUDGET[key] else 'OVER BUDGET'
+        over = over or seconds > BUDGET[key]
+        print(f'{key:>9}: {seconds:6.3f}s  (budget {BUDGET[key]:.1f}s)  {status}')
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+benchmarks/bench_text.py: BoundText latency against document size
+
+    -keystroke: one character typed, with its <<Modified>> handled
+    -pause: one character typed and pushed to the variable, the copy
+     made once per typing pause
+    -set: a programmatic variable.set() of a slightly changed document
+"""
+
+import tkinter as tk
+
+from blueprint import widgets as w
+
+from .common import measure
+
+
+def _document(size):
+    line = 'The quick brown fox jumps over the lazy dog. ' * 2 + '\n'
+    return (line * (size // len(line) + 1))[:size]
+
+
+def bench_keystroke(root, size, repeat):
+    var = tk.StringVar(root, _document(size))
+    text = w.BoundText(root, textvariable=var)
+    text.mark_set('insert', '1.0 + %d chars' % (size // 2))
+
+    def type_key():
+        text.insert('insert', 'x')
+        # deliver <<Modified>>; the push waits for a pause in typing
+        text.update()
+
+    result = measure(type_key, repeat, params={'chars': size})
+    text.destroy()
+    return result
+
+
+def bench_pause(root, size, repeat):
+    var = tk.StringVar(root, _document(size))
+    text = w.BoundText(root, textvariable=var)
+    text.mark_set('insert', '1.0 + %d chars' % (size // 2))
+
+    def type_and_pause():
+        text.insert('insert', 'x')
+        text.update()
+        # what the flush_delay timer runs once the typing stops
+        text.sync()
+
+    result = measure(type_and_pause, repeat, params={'chars': size})
+    text.destroy()
+    return result
+
+
+def bench_set(root, size, repeat):
+    document = _document(size)
+    var = tk.StringVar(root, document)
+    text = w.BoundText(root, textvariable=var)
+    documents = [
+        document[:size // 2] + str(i) + document[size // 2:]
+        for i in range(repeat)
+    ]
+    documents.reverse()
+
+    def set_document():
+        var.set(documents.pop())
+        text.update()
+
+    result = measure(set_document, repeat, params={'chars': size})
+    text.destroy()
+    return result
+
+
+def run(quick=False):
+    repeat = 5 if quick else 20
+    sizes = [1000, 1000000] if quick else [1000, 100000, 1000000, 5000000]
+
+    root = tk.Tk()
+    results = {}
+    try:
+        for size in sizes:
+            results[f'bound_text.keystroke.chars={size}'] = (
+                bench_keystroke(root, size, repeat))
+            results[f'bound_text.pause.chars={size}'] = (
+                bench_pause(root, size, repeat))
+            results[f'bound_text.set.chars={size}'] = (
+                bench_set(root, size, repeat))
+    finally:
+        root.destroy()
+    return results
@@ -0,0 +1,65 @@
+"""
+benchmarks/common.py: timing and result helpers shared by the benchmarks
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def require_display():
+    """Exit with a hint when there is no X display to create windows on"""
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        sys.exit('No display found; run the benchmarks under xvfb-run')
+
+
+def measure(fn, repeat=5, setup=None, params=None, teardown=None):
+    """Time fn() repeat times and summarize the runs in seconds.
+
+    setup(), when given, runs untimed before every call and its result
+    is passed to fn. teardown, when given, runs untimed after every
+    call with fn's result, e.g. to destroy a widget fn built.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        result = fn(arg) if setup else fn()
+        times.append(time.perf_counter() - start)
+        if teardown:
+            teardown(result)
+    return {
+        'median': statistics.median(times),
+        'min': min(times),
+        'max': max(times),
+        'repeat': repeat,
+        'params': params or {}
+    }
+
+
+def save(results, path):
+    with open(path, 'w') as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(results, baseline, threshold=0.10):
+    """Return (name, baseline, current, change) rows and whether any
+    median got slower than the baseline by more than threshold"""
+    rows = []
+    regressed = False
+    for name, result in sorted(results.items()):
+        old = baseline.get(name)
+        if old is None:
+            rows.append((name, None, result['median'], None))
+            continue
+        change = result['median'] / old['median'] - 1
+        regressed = regressed or change > threshold
+        rows.append((name, old['median'], result['median'], change))
+    return rows, regressed
@@ -0,0 +1,67 @@
+"""
+benchmarks/run.py: run the benchmark suite and compare with a baseline
+
+Results are written as JSON, keyed by benchmark name, with the median,
+min and max seconds of each. Given a baseline file from an earlier run,
+every median is compared to it and the exit status is 1 when any got
+slower by more than the threshold.
+
+On a Linux box without a display:
+
+    xvfb-run python -m benchmarks.run --output new.json --baseline old.json
+"""
+
+import argparse
+import sys
+
+from . import bench_charts, bench_startup, bench_text
+from .common import compare, load, require_display, save
+
+SUITES = {
+    'charts': bench_charts,
+    'text': bench_text,
+    'startup': bench_startup
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run the blueprint benchmarks')
+    parser.add_argument(
+        '--only', action='append', choices=sorted(SUITES),
+        help='run only this suite (repeatable)')
+    parser.add_argument(
+        '--quick', action='store_true', help='fewer sizes and repeats')
+    parser.add_argument(
+        '--output', default='bench_results.json', help='results file')
+    parser.add_argument('--baseline', help='results file to compare with')
+    parser.add_argument(
+        '--threshold', type=float, default=0.10,
+        help='allowed slowdown before failing, as a fraction')
+    args = parser.parse_args()
+
+    require_display()
+    results = {}
+    for name in args.only or SUITES:
+        print(f'running {name}...', file=sys.stderr)
+        results.update(SUITES[name].run(quick=args.quick))
+    save(results, args.output)
+
+    if not args.baseline:
+        for name, result in sorted(results.items()):
+            print(f'{name:<55} {result["median"] * 1000:10.3f} ms')
+        return 0
+
+    rows, regressed = compare(results, load(args.baseline), args.threshold)
+    for name, old, new, change in rows:
+        if old is None:
+            print(f'{name:<55} {new * 1000:10.3f} ms  (new)')
+        else:
+            flag = '  REGRESSION' if change > args.threshold else ''
+            print(f'{name:<55} {old * 1000:10.3f} -> {new * 1000:10.3f} ms'
+                  f'  {change:+7.1%}{flag}')
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
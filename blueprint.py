@@ -7,13 +7,24 @@ The code is organized in the following classes:
     -MyForm: Input form for widgets
     -Application: Application root window
 
+Run with --help for the profiling switches (blueprint/profiling.py).
+
 TODO:
 
-Author: 
+Author:
 """
 
+import argparse
 
+from blueprint import profiling
 from blueprint.application import Application
 
-app = Application()
-app.mainloop()
+parser = argparse.ArgumentParser(description='Run the blueprint application')
+profiling.add_arguments(parser)
+args = parser.parse_args()
+
+with profiling.session(
+    args.profile, args.sample_interval, args.trace_memory, args.profile_dir
+):
+    app = Application()
+    app.mainloop()
@@ -0,0 +1,167 @@
+"""
+blueprint/aggregate.py: parallel group-by means over raw measurement files
+
+A file is cut into byte ranges aligned to line starts; each range is
+streamed in chunks by a worker process, which keeps only a partial
+count and sum per group. The partial results are merged at the end,
+so memory use depends on the chunk size and the number of groups, not
+the file size.
+
+Raw files are CSV with a header line, or JSON lines (.jsonl). A CSV
+record may not span lines.
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .constants import FieldTypes as FT
+from .dataset import Dataset
+
+# separates the parts of a group key while grouping a chunk
+_KEY_SEP = '\x1f'
+
+
+def split_ranges(path, parts, start=0):
+    """Return up to parts (start, stop) byte ranges covering the file
+    from start, each beginning at a line start"""
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, 'rb') as fh:
+        for i in range(1, parts):
+            fh.seek(max(bounds[-1], start + (size - start) * i // parts))
+            fh.readline()  # move on to the next line start
+            if fh.tell() >= size:
+                break
+            if fh.tell() > bounds[-1]:
+                bounds.append(fh.tell())
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _read_lines(path, start, stop, chunk_rows):
+    """Yield lists of decoded lines from the byte range, chunk by chunk"""
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        chunk = []
+        while fh.tell() < stop:
+            line = fh.readline()
+            if not line:
+                break
+            line = line.decode('utf-8').rstrip('\r\n')
+            if line:
+                chunk.append(line)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _parse(lines, fmt, header, group_by, values):
+    """Return (keys, value arrays) for a chunk of lines"""
+    if fmt == 'csv':
+        rows = list(csv.reader(lines))
+        group_index = [header.index(key) for key in group_by]
+        value_index = [header.index(key) for key in values]
+        keys = [_KEY_SEP.join(row[i] for i in group_index) for row in rows]
+        columns = [[row[i] for i in value_index] for row in rows]
+    else:
+        records = [json.loads(line) for line in lines]
+        keys = [
+            _KEY_SEP.join(str(record[key]) for key in group_by)
+            for record in records
+        ]
+        columns = [[record[key] for key in values] for record in records]
+    return keys, np.asarray(columns, dtype=float).reshape(-1, len(values))
+
+
+def _aggregate_range(path, start, stop, fmt, header, group_by, values,
+                     chunk_rows):
+    """Worker: partial {key: [count, sum per value]} for one byte range"""
+    partial = {}
+    for lines in _read_lines(path, start, stop, chunk_rows):
+        keys, columns = _parse(lines, fmt, header, group_by, values)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique))
+        sums = np.column_stack([
+            np.bincount(inverse, weights=columns[:, i], minlength=len(unique))
+            for i in range(len(values))
+        ])
+        for key, count, row in zip(unique.tolist(), counts, sums):
+            entry = partial.get(key)
+            if entry is None:
+                partial[key] = [int(count), row]
+            else:
+                entry[0] += int(count)
+                entry[1] = entry[1] + row
+    return partial
+
+
+def _merge(partials):
+    merged = {}
+    for partial in partials:
+        for key, (count, sums) in partial.items():
+            if key in merged:
+                merged[key][0] += count
+                merged[key][1] = merged[key][1] + sums
+            else:
+                merged[key] = [count, sums]
+    return merged
+
+
+def aggregate(path, group_by, values, fields=None, processes=None,
+              chunk_rows=100000):
+    """Group the raw file by group_by and average the values columns.
+
+    Returns a Dataset with one row per group: the group_by columns
+    (typed by fields, strings by default), `count`, and for each value
+    column its mean under the same name and its total as `<name>_sum`.
+    Rows come sorted by the group_by values.
+    """
+    fmt = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    header, start = None, 0
+    if fmt == 'csv':
+        with open(path, 'rb') as fh:
+            header = next(csv.reader([fh.readline().decode('utf-8')]))
+            start = fh.tell()
+
+    processes = processes or os.cpu_count() or 1
+    ranges = split_ranges(path, processes, start)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        partials = pool.map(
+            _aggregate_range,
+            *zip(*[
+                (path, a, b, fmt, header, group_by, values, chunk_rows)
+                for a, b in ranges
+            ])
+        )
+        merged = _merge(partials)
+
+    fields = fields or {}
+    keys = sorted(merged)
+    columns = {'count': [merged[key][0] for key in keys]}
+    parts = list(zip(*(key.split(_KEY_SEP) for key in keys))) or [
+        () for _ in group_by]
+    for name, column in zip(group_by, parts):
+        columns[name] = column
+    sums = np.array([merged[key][1] for key in keys]).reshape(-1, len(values))
+    for i, name in enumerate(values):
+        columns[f'{name}_sum'] = sums[:, i]
+        columns[name] = sums[:, i] / np.maximum(columns['count'], 1)
+
+    spec = {name: fields.get(name, {'type': FT.string}) for name in group_by}
+    spec['count'] = {'type': FT.integer}
+    for name in values:
+        spec[name] = {'type': FT.decimal}
+        spec[f'{name}_sum'] = {'type': FT.decimal}
+    dataset = Dataset(spec, columns)
+
+    # sort typed keys by value rather than text
+    key_columns = [dataset[name].tolist() for name in group_by]
+    order = sorted(range(len(dataset)), key=lambda i: tuple(
+        column[i] for column in key_columns))
+    return dataset.take(np.array(order, dtype=np.int64))
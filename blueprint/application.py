@@ -3,8 +3,15 @@ blueprint/application.py: root window class
 """
 import tkinter as tk
 from tkinter import ttk
+import os
+
+from . import instrument
 from . import views as v
 from . import models as m
+from .scheduler import RenderScheduler
+from .sources import Follower
+from .storage import SQLiteStore
+from .tasks import TaskExecutor
 
 
 class Application(tk.Tk):  # subclase from Tk instead of Frame
@@ -19,7 +26,25 @@ class Application(tk.Tk):  # subclase from Tk instead of Frame
         super().__init__(*args, **kwargs)
 
         self.model = m.myModel()
-        self.myform = v.MyForm(self, self.model)
+        self.translator = m.TextToBinary()
+        # model work runs here, off the Tk thread
+        self.executor = TaskExecutor(self)
+        # chart views redraw through here, at most once per frame
+        self.renderer = RenderScheduler(self, max_fps=30)
+
+        # opt-in instrumentation, see blueprint/instrument.py
+        self._lag_probe = None
+        if instrument.enabled:
+            self._lag_probe = instrument.LagProbe(self)
+            self._lag_probe.start()
+            self.bind('<Control-D>', self.show_debug_overlay)
+
+        # opened on first save
+        self.store = None
+        # files and feeds being followed, see follow_file()
+        self.followers = []
+        # example charts still loading; <<ChartsReady>> fires at zero
+        self._charts_pending = 0
 
         # window title
         self.title('Blueprint Application')
@@ -32,73 +57,224 @@ class Application(tk.Tk):  # subclase from Tk instead of Frame
         ).grid(row=0)
 
         # Add form with widgets
-        self.myform = v.MyForm(self, self.model)
+        self.myform = v.MyForm(
+            self, self.model,
+            translator=self.translator, on_save=self._on_save
+        )
 
         self.myform.grid(row=1, padx=10, sticky=tk.W + tk.E)
-    #     self.myform.bind('<<TranslateText>>', self._on_trans)
-
-    # def _on_trans(self, *_):
-    #     # retrieve input
-    #     data = self.myform.get()
-    #     # translate
-    #     output = self.model.translate(data)
-    #     # activate output
-    #     self.myform._disable_var.set(False)
-    #     # self.myform.set_output_state(tk.NORMAL)
-
-    #     # set output
-    #     self.myform._vars['Output'].set(output)
-
-    #     # disable output
-    #     self.myform._disable_var.set(True)
-    #     # self.myform.set_output_state(tk.DISABLED)
-
-
-
-        ############# EXAMPLE PLOTS #############
-        def show_mychart(self, *_):
-            data_nodes = self.model.nodes()
-            data = data_nodes
-            # popup = tk.Toplevel()
-            chart = v.LineChartView(
-                self.myform, data, (800,400),
-                'Day','Average Height (cm)','lab_id'
-            )
-            # chart.pack(fill='both', expand=True)
-            chart.grid(row=0, column=0)
-        
-        show_mychart(self)
-
-        def show_yield_chart(self, *_):
-            chart = v.YieldChartView(
-            self.myform,
-            'Average plot humidity', 
-            'Average plot temperature',
-            'Yield as a product of humidity and temperature'
-            )
-            chart.grid(sticky=tk.E + tk.W, row=1, column=0)
-
-            data_seeds = self.model.seeds()
-            seed_colors = {
-                'AXM477': 'red', 
-                'AXM478': 'yellow',
-                'AXM479': 'green', 
-                'AXM480': 'blue'
-            }
 
+        # status bar
+        self.status = tk.StringVar()
+        ttk.Label(self, textvariable=self.status).grid(sticky=tk.W, row=2)
+
+        # translations stream into Output; Escape stops one
+        self._translation = None
+        self.myform.bind('<<TranslateText>>', self._on_trans)
+        self.myform.bind('<<TranslateBinary>>', self._on_trans_back)
+        self.bind('<Escape>', self.cancel_translation)
+
+        # The example charts are built once the window is first drawn,
+        # so startup is not held up by matplotlib and figure construction
+        self._mapped = False
+        self.bind('<Map>', self._on_first_map, add='+')
+
+    def _on_first_map(self, event):
+        # <Map> on the root window also fires for its children; other
+        # code may bind <Map> too, so the binding is left in place
+        if event.widget is not self or self._mapped:
+            return
+        self._mapped = True
+        self.after_idle(self.show_examples)
+
+    ############# EXAMPLE PLOTS #############
+    def show_examples(self, *_):
+        # finish painting the window before the slow part
+        self.update_idletasks()
+        self._charts_pending = 2
+        self.show_mychart()
+        self.show_yield_chart()
 
+    def _chart_ready(self):
+        # charts opened on their own are not counted
+        if not self._charts_pending:
+            return
+        self._charts_pending -= 1
+        if not self._charts_pending:
+            self.event_generate('<<ChartsReady>>')
+
+    def show_mychart(self, *_):
+        # popup = tk.Toplevel()
+        chart = v.LineChartView(
+            self.myform, [], (800,400),
+            'Day','Average Height (cm)','lab_id',
+            scheduler=self.renderer
+        )
+        # chart.pack(fill='both', expand=True)
+        chart.grid(row=0, column=0)
+        chart.set_pending(True)
+
+        def on_nodes(data_nodes):
+            chart.append(data_nodes)
+            chart.set_pending(False)
+            self._chart_ready()
+
+        # the grouping is cached, so further charts of nodes are free
+        self.executor.submit(
+            self.model.query, 'nodes', 'group_by', 'lab_id',
+            on_done=on_nodes
+        )
+
+    def show_yield_chart(self, *_):
+        chart = v.YieldChartView(
+        self.myform,
+        'Average plot humidity', 
+        'Average plot temperature',
+        'Yield as a product of humidity and temperature',
+        scheduler=self.renderer,
+        series_label='Seed',
+        size_label='Yield'
+        )
+        chart.grid(sticky=tk.E + tk.W, row=1, column=0)
+        chart.bind(
+            '<<PointSelected>>',
+            lambda _: self.status.set(
+                chart.describe(chart.selection or {}, sep=', '))
+        )
+        chart.set_pending(True)
+
+        seed_colors = {
+            'AXM477': 'red', 
+            'AXM478': 'yellow',
+            'AXM479': 'green', 
+            'AXM480': 'blue'
+        }
+
+        def on_seeds(by_seed):
+            chart.set_pending(False)
             for seed, color in seed_colors.items():
-                seed_data = [
-                    (x['avg_humidity'], x['avg_temperature'], x['yield'])
-                    for x in data_seeds if x['seed_sample'] == seed
-                ]
-                # print(f"Seed: {seed}, Data: {seed_data}")
                 # Draw scatter for this seed
-                if seed_data:  # Ensure there's data for the seed
-                    chart.draw_scatter(seed_data, color, seed)
+                if seed in by_seed:  # Ensure there's data for the seed
+                    chart.draw_columns(
+                        *by_seed[seed].select(
+                            'avg_humidity', 'avg_temperature', 'yield'),
+                        color, seed
+                    )
+            self._chart_ready()
+
+        # group in the background too
+        self.executor.submit(
+            self.model.query, 'seeds', 'group_by', 'seed_sample',
+            on_done=on_seeds
+        )
+
+    ############### TRANSLATION #############
+    def _on_trans(self, *_):
+        self.translate(reverse=False)
+
+    def _on_trans_back(self, *_):
+        self.translate(reverse=True)
+
+    def translate(self, reverse=False):
+        """Translate the Input field into Output in the background.
+
+        Output is filled chunk by chunk as the translation runs, and the
+        status bar shows the progress. Starting another translation
+        cancels this one.
+        """
+        self.cancel_translation()
+        self.myform.sync()
+        text = self.myform._vars['Input'].get()
+        output = self.myform.output
+        self.myform._vars['Output'].set('')
+        self.status.set('Translating...')
+
+        def on_progress(value):
+            chunk, done = value
+            output.append(chunk)
+            self.status.set(f'Translating... {done:.0%} (Esc to stop)')
+
+        def on_done(_):
+            self._translation = None
+            output.sync()
+            self.status.set('Translated')
+
+        def on_error(e):
+            self._translation = None
+            output.sync()
+            self.status.set(f'Translation failed: {e}')
+
+        self._translation = self.executor.submit(
+            self.translator.stream, text, reverse, cooperative=True,
+            on_progress=on_progress, on_done=on_done, on_error=on_error
+        )
+        return self._translation
+
+    def cancel_translation(self, *_):
+        if self._translation is not None:
+            self._translation.cancel()
+            self._translation = None
+            self.myform.output.sync()
+            self.status.set('Translation stopped')
+
+    def show_debug_overlay(self, *_):
+        instrument.DebugOverlay(self)
+
+    def _on_save(self, *_):
+        """Save the form record; the write happens off the Tk thread"""
+        try:
+            data = self.myform.get()
+        except ValueError as e:
+            self.status.set(str(e))
+            return
+        if self.store is None:
+            self.store = SQLiteStore(
+                os.environ.get('BLUEPRINT_DB', 'blueprint.db'))
+        self.status.set('Saving...')
+        self.executor.watch(
+            self.store.save_record('form', self.model.fields, data),
+            on_done=lambda _: self.status.set('Saved'),
+            on_error=lambda e: self.status.set(f'Save failed: {e}')
+        )
+
+    def follow_file(self, path, chart, rate=10):
+        """Feed rows appended to path into a chart, rate times a second
+        at most"""
+        follower = Follower(self, self.model.tail(path), chart.append, rate)
+        follower.start()
+        self.followers.append(follower)
+        return follower
+
+    def follow_feed(self, address, chart, rate=10):
+        """Feed rows from a network feed into a chart, rate times a
+        second at most; see blueprint/feed.py"""
+        follower = Follower(self, self.model.feed(address), chart.append, rate)
+        follower.start()
+        self.followers.append(follower)
+        return follower
+
+    def show_table(self, dataset, title='Data'):
+        """Browse a dataset in its own window"""
+        popup = tk.Toplevel(self)
+        popup.title(title)
+        v.TableView(popup, dataset).pack(fill='both', expand=True)
+        return popup
 
-        show_yield_chart(self)
-        ############### END EXAMPLES ############
+    def destroy(self):
+        if self._lag_probe:
+            self._lag_probe.stop()
+            path = os.environ.get('BLUEPRINT_INSTRUMENT_FILE')
+            if path:
+                instrument.dump(path)
+        for follower in self.followers:
+            follower.stop()
+        self.model.close()
+        self.executor.shutdown()
+        if self.store is not None:
+            self.store.close()
+        self.renderer.cancel()
+        super().destroy()
+    ############### END EXAMPLES ############
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+"""
+blueprint/buffers.py: fixed-size buffers for streaming data
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of float rows.
+
+    Once full, every new row overwrites the oldest one, so memory use is
+    set by the capacity and not by how long the stream has been running.
+    `dropped` counts the rows overwritten so far.
+    """
+
+    def __init__(self, capacity, width=2):
+        self._data = np.empty((capacity, width))
+        self._start = 0
+        self._size = 0
+        self.dropped = 0
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, rows):
+        """Append rows, overwriting the oldest ones when full"""
+        rows = np.asarray(rows, dtype=float).reshape(-1, self._data.shape[1])
+        capacity = self.capacity
+        if len(rows) >= capacity:
+            # only the newest rows fit; the buffer is replaced wholesale
+            self.dropped += self._size + len(rows) - capacity
+            self._data[:] = rows[-capacity:]
+            self._start = 0
+            self._size = capacity
+            return
+
+        end = (self._start + self._size) % capacity
+        first = min(len(rows), capacity - end)
+        self._data[end:end + first] = rows[:first]
+        self._data[:len(rows) - first] = rows[first:]
+
+        overflow = self._size + len(rows) - capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % capacity
+            self._size = capacity
+            self.dropped += overflow
+        else:
+            self._size += len(rows)
+
+    def view(self):
+        """Return the rows oldest first.
+
+        This is a view into the buffer when the rows are contiguous and
+        a copy when they wrap around the end.
+        """
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._data[self._start:end]
+        return np.concatenate(
+            (self._data[self._start:], self._data[:end - self.capacity])
+        )
@@ -0,0 +1,77 @@
+"""
+blueprint/cache.py: memory-bounded LRU cache for derived query results
+"""
+
+import collections
+import threading
+
+import numpy as np
+
+from .dataset import Dataset
+
+
+def nbytes(value):
+    """Estimate the bytes held by a query result.
+
+    Datasets and arrays report their buffers; tuples, lists and dicts
+    add up their items. Anything else counts as nothing.
+    """
+    if isinstance(value, (Dataset, np.ndarray)):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(nbytes(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(item) for item in value)
+    return 0
+
+
+class QueryCache:
+    """Least recently used results, evicted to stay under max_bytes.
+
+    Keys are tuples whose first item names the dataset they were derived
+    from, so invalidate(name) drops exactly that dataset's entries. A
+    result bigger than the whole budget is returned but not kept. Safe
+    to use from the TaskExecutor's threads.
+    """
+
+    def __init__(self, max_bytes=64 << 20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (value, bytes)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, compute):
+        """Return the value cached for key, or compute() and cache it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        # compute outside the lock; a concurrent miss just does it twice
+        value = compute()
+        size = nbytes(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+        return value
+
+    def invalidate(self, name=None):
+        """Drop the entries derived from dataset name, or all of them"""
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key[0] == name:
+                    self.size -= self._entries.pop(key)[1]
@@ -0,0 +1,239 @@
+"""
+blueprint/dataset.py: columnar data store returned by the models
+"""
+
+import re
+
+import numpy as np
+
+from .constants import FieldTypes as FT
+
+
+def _attribute_name(key):
+    """Turn a field name like 'Average Height (cm)' into average_height_cm"""
+    name = re.sub(r'\W+', '_', key).strip('_').lower()
+    return name if name.isidentifier() else f'f_{name}'
+
+
+class RowView:
+    """Attribute and item access to one row of a Dataset.
+
+    A row view only holds its dataset and index; values are read from
+    the columns when asked for.
+    """
+
+    __slots__ = ('_dataset', '_index')
+
+    def __init__(self, dataset, index):
+        self._dataset = dataset
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._dataset.value(key, self._index)
+
+    def as_dict(self):
+        return {key: self[key] for key in self._dataset.fields}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.as_dict()!r})'
+
+
+# tuple of field names -> RowView subclass
+_record_types = {}
+
+
+def record_type(fields):
+    """Return a RowView class with one property per field.
+
+    Field names are turned into identifiers, so 'Average Height (cm)'
+    is read as row.average_height_cm. Classes are cached per set of
+    field names.
+    """
+    keys = tuple(fields)
+    if keys not in _record_types:
+        attributes = {'__slots__': ()}
+        for key in keys:
+            attributes[_attribute_name(key)] = property(
+                lambda self, key=key: self._dataset.value(key, self._index))
+        _record_types[keys] = type('Record', (RowView,), attributes)
+    return _record_types[keys]
+
+
+class Dataset:
+    """A table held as one contiguous array per field.
+
+    `fields` uses the same spec format as the models' `fields`
+    dictionaries; each field's FieldTypes entry picks the array dtype.
+    Short strings such as lab or seed ids are interned: the column holds
+    small integer codes into a sorted array of categories, so a repeated
+    value costs one or two bytes per row.
+    Datasets are not modified in place: filter, group_by and select
+    return new datasets or arrays.
+    """
+
+    # this dictionary translates our model's field types
+    # into the numpy dtype used to store the column
+    dtypes = {
+        FT.string: object,
+        FT.string_list: object,
+        FT.short_string_list: object,
+        FT.iso_date_string: 'datetime64[D]',
+        FT.long_string: object,
+        FT.decimal: np.float64,
+        FT.integer: np.int64,
+        FT.boolean: np.bool_
+    }
+    # field types stored as codes into a category array
+    categorical = {FT.string, FT.short_string_list}
+
+    def __init__(self, fields, columns):
+        self.fields = fields
+        self.columns = {}     # field -> array; codes for categorical fields
+        self.categories = {}  # categorical field -> sorted unique values
+        for key, spec in fields.items():
+            column = np.asarray(columns[key], dtype=self.dtypes[spec['type']])
+            if spec['type'] in self.categorical:
+                categories, codes = np.unique(column, return_inverse=True)
+                self.categories[key] = categories
+                column = codes.astype(np.min_scalar_type(len(categories)))
+            self.columns[key] = column
+        lengths = {len(column) for column in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('Dataset columns differ in length')
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_records(cls, records, fields=None):
+        """Build a dataset from a sequence of dicts.
+
+        Without a fields spec the field types are inferred from the
+        values of the records.
+        """
+        records = list(records)
+        keys = fields or (records[0] if records else {})
+        columns = {key: [row[key] for row in records] for key in keys}
+        if fields is None:
+            fields = cls._infer_fields(columns)
+        return cls(fields, columns)
+
+    @staticmethod
+    def _infer_fields(columns):
+        kinds = {'b': FT.boolean, 'i': FT.integer, 'u': FT.integer,
+                 'f': FT.decimal}
+        return {
+            key: {'type': kinds.get(np.asarray(values).dtype.kind, FT.string)}
+            for key, values in columns.items()
+        }
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        """Return the values of a field as an array"""
+        column = self.columns[key]
+        if key in self.categories:
+            return self.categories[key][column]
+        return column
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column and category arrays"""
+        return sum(column.nbytes for column in self.columns.values()) + sum(
+            categories.nbytes for categories in self.categories.values())
+
+    def value(self, key, index):
+        """Return one value of a field"""
+        value = self.columns[key][index]
+        if key in self.categories:
+            value = self.categories[key][value]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def values(self, key, index):
+        """Return the values of a field at an index array; unlike
+        self[key][index] this only decodes the picked rows"""
+        column = self.columns[key][index]
+        if key in self.categories:
+            return self.categories[key][column]
+        return column
+
+    def row(self, index):
+        """Return a row view with one attribute per field"""
+        return record_type(self.fields)(self, index)
+
+    def rows(self):
+        """Yield a row view per row"""
+        record = record_type(self.fields)
+        for index in range(len(self)):
+            yield record(self, index)
+
+    def records(self):
+        """Yield the rows as dicts, for code that still wants them"""
+        keys = list(self.columns)
+        for values in zip(*(self[key].tolist() for key in keys)):
+            yield dict(zip(keys, values))
+
+    def take(self, index):
+        """Return the rows picked by an index array or boolean mask"""
+        dataset = object.__new__(Dataset)
+        dataset.fields = self.fields
+        dataset.columns = {
+            key: column[index] for key, column in self.columns.items()
+        }
+        # categories are shared; unused ones are harmless
+        dataset.categories = self.categories
+        dataset._length = len(next(iter(dataset.columns.values()), ()))
+        return dataset
+
+    def mask(self, **equals):
+        """Return a boolean array of the rows where every field in
+        equals holds the given value"""
+        mask = np.ones(len(self), dtype=bool)
+        for key, value in equals.items():
+            if key in self.categories:
+                categories = self.categories[key]
+                code = np.searchsorted(categories, value)
+                if code == len(categories) or categories[code] != value:
+                    mask[:] = False
+                    continue
+                mask &= self.columns[key] == code
+            else:
+                mask &= self.columns[key] == value
+        return mask
+
+    def filter(self, mask=None, **equals):
+        """Return the rows where mask is true and every field in equals
+        holds the given value"""
+        if mask is None:
+            mask = self.mask(**equals)
+        else:
+            mask = np.array(mask, dtype=bool) & self.mask(**equals)
+        return self.take(mask)
+
+    def argsort(self, key):
+        """Return the row order that sorts a field, stable"""
+        # categories are sorted, so their codes sort the same way
+        return np.argsort(self.columns[key], kind='stable')
+
+    def group_by(self, key):
+        """Split into one dataset per distinct value of key.
+
+        Groups are returned in sorted key order and keep the original
+        row order inside each group.
+        """
+        if key in self.categories:
+            values = self.categories[key]
+            inverse = self.columns[key]
+        else:
+            values, inverse = np.unique(self.columns[key], return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        counts = np.bincount(inverse, minlength=len(values))
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        return {
+            value: self.take(order[start:stop])
+            for value, start, stop in zip(values.tolist(), bounds, bounds[1:])
+            if stop > start
+        }
+
+    def select(self, *keys):
+        """Return the columns for keys, in order"""
+        return tuple(self[key] for key in keys)
@@ -0,0 +1,189 @@
+"""
+blueprint/export.py: headless PNG/SVG export of the chart views
+
+Charts are described by plain, picklable spec dicts and rendered with
+matplotlib's Agg canvas, so no Tk root is created. Jobs fan out over a
+process pool, one chart per task.
+
+    -line_spec: a LineChartView chart
+    -yield_spec: a YieldChartView chart
+    -render: draw one spec to its file
+    -export: draw many specs in parallel
+
+Command line, exporting the example charts:
+
+    python -m blueprint.export OUTDIR --format svg
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from . import lod
+from .dataset import Dataset
+from .views import LineChartView, YieldChartView
+
+
+def line_spec(path, data, plot_size, x_field, y_field, plot_by_field):
+    """Describe a chart as LineChartView would draw it"""
+    if not isinstance(data, Dataset):
+        data = Dataset.from_records(data)
+    return {
+        'kind': 'line', 'path': path, 'data': data,
+        'plot_size': plot_size, 'x_field': x_field, 'y_field': y_field,
+        'plot_by_field': plot_by_field
+    }
+
+
+def yield_spec(path, x_axis, y_axis, title, series):
+    """Describe a chart as YieldChartView would draw it
+
+    series holds one (x, y, size, color, label) entry per draw_columns
+    call.
+    """
+    return {
+        'kind': 'yield', 'path': path, 'x_axis': x_axis, 'y_axis': y_axis,
+        'title': title, 'series': series
+    }
+
+
+def _figure(size, dpi):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _render_line(spec):
+    chart = LineChartView
+    dpi = 100
+    plot_width, plot_height = spec['plot_size']
+    width = plot_width + 2 * chart.margin
+    height = plot_height + 2 * chart.margin
+    figure = _figure((width / dpi, height / dpi), dpi)
+    figure.set_facecolor(chart.background)
+    axes = figure.add_axes((
+        chart.margin / width, chart.margin / height,
+        plot_width / width, plot_height / height
+    ))
+    axes.set_facecolor(chart.plot_background)
+    axes.set_xticks([])
+    axes.set_yticks([])
+    axes.set_xlabel(spec['x_field'])
+    axes.set_ylabel(spec['y_field'])
+
+    groups = spec['data'].group_by(spec['plot_by_field'])
+    pyramids = {
+        name: lod.Pyramid(*part.select(spec['x_field'], spec['y_field']))
+        for name, part in groups.items()
+    }
+    if not pyramids:
+        return figure
+    x0, x1, y0, y1 = lod.bounds(list(pyramids.values()))
+    axes.set_xlim(x0, x1)
+    axes.set_ylim(y0, y1)
+    # canvas widths are pixels, matplotlib's are points
+    line_width = chart.line_width * 72 / dpi
+    rows = plot_height // chart.legend_row_height
+    for i, (name, pyramid) in enumerate(pyramids.items()):
+        color = chart.series_color(i)
+        x, y, _ = pyramid.query(x0, x1, plot_width)
+        axes.plot(x, y, color=color, linewidth=line_width)
+        if i < rows:
+            # the legend shows the series that fit, as the view's does
+            axes.text(
+                10 / plot_width,
+                1 - (10 + i * chart.legend_row_height) / plot_height, name,
+                color=color, va='center', transform=axes.transAxes
+            )
+    return figure
+
+
+def _render_yield(spec):
+    chart = YieldChartView
+    figure = _figure(chart.figsize, chart.dpi)
+    axes = chart.setup_axes(
+        figure, spec['x_axis'], spec['y_axis'], spec['title'])
+    scatters, labels = [], []
+    for x, y, size, color, label in spec['series']:
+        scatters.append(axes.scatter(
+            x, y, chart.scaled_size(size),
+            c=color, label=label, alpha=chart.alpha
+        ))
+        labels.append(label)
+    if scatters:
+        axes.legend(scatters, labels)
+    return figure
+
+
+renderers = {
+    'line': _render_line,
+    'yield': _render_yield
+}
+
+
+def render(spec):
+    """Draw one chart spec to spec['path']; the format follows its
+    extension. Returns the path."""
+    figure = renderers[spec['kind']](spec)
+    figure.savefig(spec['path'], bbox_inches='tight')
+    return spec['path']
+
+
+def export(specs, processes=None):
+    """Render specs in parallel over a process pool; return the paths"""
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(render, specs))
+
+
+def example_specs(model, outdir, fmt='png'):
+    """The example charts that Application shows, as specs"""
+    seed_colors = {
+        'AXM477': 'red',
+        'AXM478': 'yellow',
+        'AXM479': 'green',
+        'AXM480': 'blue'
+    }
+    by_seed = model.seeds().group_by('seed_sample')
+    series = [
+        (*by_seed[seed].select('avg_humidity', 'avg_temperature', 'yield'),
+         color, seed)
+        for seed, color in seed_colors.items() if seed in by_seed
+    ]
+    return [
+        line_spec(
+            os.path.join(outdir, f'line_chart.{fmt}'), model.nodes(),
+            (800, 400), 'Day', 'Average Height (cm)', 'lab_id'
+        ),
+        yield_spec(
+            os.path.join(outdir, f'yield_chart.{fmt}'),
+            'Average plot humidity',
+            'Average plot temperature',
+            'Yield as a product of humidity and temperature',
+            series
+        )
+    ]
+
+
+def main():
+    from .models import myModel
+
+    parser = argparse.ArgumentParser(
+        description='Export the example charts without a display')
+    parser.add_argument('outdir')
+    parser.add_argument('--format', default='png', choices=('png', 'svg'))
+    parser.add_argument('--processes', type=int)
+    args = parser.parse_args()
+
+    os.makedirs(args.outdir, exist_ok=True)
+    specs = example_specs(myModel(), args.outdir, args.format)
+    for path in export(specs, args.processes):
+        print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
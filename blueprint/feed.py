@@ -0,0 +1,239 @@
+"""
+blueprint/feed.py: network feed of measurements over asyncio
+
+FeedClient reads JSON lines from a TCP or Unix socket on an asyncio
+loop of its own thread and hands decoded records to the Tk thread
+through a bounded queue; poll it with sources.Follower like a
+TailSource. StandInServer serves records the same way, for trying the
+client without a real feed.
+"""
+
+import asyncio
+import itertools
+import json
+import queue
+import random
+import threading
+
+from .sources import to_dataset
+
+
+def _is_unix(address):
+    """A str address is a Unix socket path, a tuple is (host, port)"""
+    return isinstance(address, str)
+
+
+class _LoopThread:
+    """An asyncio loop running one coroutine on a daemon thread"""
+
+    def __init__(self, name):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._task = None
+        self._error = None
+
+    def start(self, coroutine_fn):
+        """Run coroutine_fn(ready) and wait until it sets ready, or fails"""
+        ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, args=(coroutine_fn, ready),
+            name=self.name, daemon=True
+        )
+        self._thread.start()
+        ready.wait()
+        if self._error is not None:
+            self._thread = None
+            raise self._error
+
+    def _run(self, coroutine_fn, ready):
+        self.loop = asyncio.new_event_loop()
+        self._task = self.loop.create_task(coroutine_fn(ready))
+        try:
+            self.loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._error = e
+        finally:
+            self.loop.close()
+            ready.set()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def stop(self, timeout=5):
+        if self._thread is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._task.cancel)
+        except RuntimeError:
+            pass  # the loop already finished
+        self._thread.join(timeout)
+        self._thread = None
+
+
+class FeedClient:
+    """Receive records from a socket sending one JSON object per line.
+
+    One connection is kept open and reused for the whole feed; when it
+    fails or the server closes it, the client reconnects with
+    exponential backoff. Decoded lines are queued as one batch per
+    socket read. The queue is bounded: once it is full the client stops
+    reading, so TCP flow control slows the sender rather than memory
+    growing. read() takes at most max_records per call, which bounds
+    the work done on the Tk thread each poll, and leaves out records
+    that don't fit the fields, counting them in bad_records.
+    """
+
+    read_size = 1 << 16
+    # seconds; doubled after each failed connect up to the maximum
+    reconnect_delay = 0.5
+    max_reconnect_delay = 30.0
+    # seconds between checks of a full queue
+    backpressure_interval = 0.01
+
+    def __init__(self, address, fields=None, max_batches=256,
+                 max_records=20000):
+        self.address = address
+        self.fields = fields
+        self.max_records = max_records
+        self.connected = False
+        self.connects = 0      # successful connections so far
+        self.bad_lines = 0     # lines that were not valid JSON
+        self.bad_records = 0   # records that didn't fit the fields
+        self._batches = queue.Queue(max_batches)
+        self._loop = _LoopThread('feed')
+
+    def start(self):
+        """Start receiving on the client's loop thread"""
+        if not self._loop.running:
+            self._loop.start(self._run)
+        return self
+
+    def close(self):
+        """Disconnect and stop the loop thread"""
+        self._loop.stop()
+        self.connected = False
+
+    async def _connect(self):
+        if _is_unix(self.address):
+            return await asyncio.open_unix_connection(self.address)
+        return await asyncio.open_connection(*self.address)
+
+    async def _run(self, ready):
+        ready.set()
+        delay = self.reconnect_delay
+        while True:
+            try:
+                reader, writer = await self._connect()
+            except OSError:
+                # jitter keeps many clients from retrying in step
+                await asyncio.sleep(delay * random.uniform(0.5, 1))
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            delay = self.reconnect_delay
+            self.connected = True
+            self.connects += 1
+            try:
+                await self._receive(reader)
+            except OSError:
+                pass
+            finally:
+                self.connected = False
+                writer.close()
+            await asyncio.sleep(delay)
+
+    async def _receive(self, reader):
+        """Queue the records from a connection until it closes"""
+        partial = b''
+        while True:
+            data = await reader.read(self.read_size)
+            if not data:
+                return
+            lines = (partial + data).split(b'\n')
+            partial = lines.pop()
+            records = []
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    self.bad_lines += 1
+            if records:
+                await self._put(records)
+
+    async def _put(self, records):
+        while True:
+            try:
+                self._batches.put_nowait(records)
+                return
+            except queue.Full:
+                await asyncio.sleep(self.backpressure_interval)
+
+    def read(self):
+        """Return a Dataset of the records received since the last read,
+        up to about max_records, or None when there are none"""
+        records = []
+        while len(records) < self.max_records:
+            try:
+                records.extend(self._batches.get_nowait())
+            except queue.Empty:
+                break
+        if not records:
+            return None
+        dataset, dropped = to_dataset(records, self.fields)
+        self.bad_records += dropped
+        return dataset
+
+
+class StandInServer:
+    """Serve records as JSON lines to every client that connects.
+
+    address is (host, port) or a Unix socket path; port 0 picks a free
+    port, found in `address` after start(). Each client gets the
+    records in order, `interval` seconds apart, forever if `repeat`.
+    """
+
+    def __init__(self, records, address=('127.0.0.1', 0), interval=0.0,
+                 repeat=False):
+        self.records = records
+        self.address = address
+        self.interval = interval
+        self.repeat = repeat
+        self._loop = _LoopThread('feed-server')
+
+    def start(self):
+        self._loop.start(self._serve)
+        return self
+
+    def close(self):
+        self._loop.stop()
+
+    async def _serve(self, ready):
+        if _is_unix(self.address):
+            server = await asyncio.start_unix_server(
+                self._handle, self.address)
+        else:
+            server = await asyncio.start_server(self._handle, *self.address)
+            self.address = server.sockets[0].getsockname()[:2]
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        records = (
+            itertools.cycle(self.records) if self.repeat else self.records)
+        try:
+            for record in records:
+                writer.write(json.dumps(record).encode() + b'\n')
+                await writer.drain()
+                if self.interval:
+                    await asyncio.sleep(self.interval)
+        except OSError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,173 @@
+"""
+blueprint/instrument.py: opt-in timing of callbacks and event-loop lag
+
+Instrumentation is off unless the BLUEPRINT_INSTRUMENT environment
+variable is set to something other than 0 (or enable() is called).
+While off, a timed() callback costs one flag check per call.
+
+    -timed: decorator recording how long a callback takes
+    -LagProbe: measures how late a periodic after() callback fires
+    -DebugOverlay: window showing rolling percentiles
+    -dump: write the same numbers to a JSON file
+"""
+
+import collections
+import functools
+import json
+import os
+import time
+import tkinter as tk
+from tkinter import ttk
+
+enabled = os.environ.get('BLUEPRINT_INSTRUMENT', '0') not in ('', '0')
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+class Stats:
+    """Rolling window of durations, in seconds"""
+
+    def __init__(self, size=1000):
+        self.samples = collections.deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {'count': self.count}
+
+        def pick(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+        return {
+            'count': self.count,
+            'mean': self.total / self.count,
+            'p50': pick(50),
+            'p95': pick(95),
+            'p99': pick(99),
+            'max': ordered[-1]
+        }
+
+
+# name -> Stats
+stats = collections.defaultdict(Stats)
+
+
+def record(name, seconds):
+    stats[name].add(seconds)
+
+
+def timed(name=None):
+    """Decorator recording the run time of a function while enabled.
+
+    Times are filed under name, or the function's qualified name.
+    """
+    def decorate(fn):
+        key = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(key, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def summary():
+    """Return a summary per recorded name"""
+    return {key: value.summary() for key, value in sorted(stats.items())}
+
+
+def dump(path):
+    """Write the summaries to a JSON file"""
+    with open(path, 'w') as fh:
+        json.dump(summary(), fh, indent=2)
+
+
+class LagProbe:
+    """Measure event-loop lag with a periodic after() callback.
+
+    Each tick records how much later than scheduled it ran; a long
+    callback or redraw shows up as lag on the next tick.
+    """
+
+    name = 'event_loop.lag'
+
+    def __init__(self, widget, interval=50):
+        self.widget = widget
+        self.interval = interval
+        self._after_id = None
+        self._expected = 0.0
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval / 1000
+        self._after_id = self.widget.after(self.interval, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        record(self.name, max(0.0, now - self._expected))
+        self._expected = now + self.interval / 1000
+        self._after_id = self.widget.after(self.interval, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+
+class DebugOverlay(tk.Toplevel):
+    """Window listing the rolling percentiles, refreshed periodically"""
+
+    columns = ('count', 'p50', 'p95', 'p99', 'max')
+
+    def __init__(self, parent, refresh=500, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.title('Instrumentation')
+        self.refresh = refresh
+        self.table = ttk.Treeview(
+            self, columns=self.columns, height=15)
+        self.table.heading('#0', text='callback')
+        self.table.column('#0', width=260)
+        for column in self.columns:
+            self.table.heading(column, text=column)
+            self.table.column(column, width=70, anchor=tk.E)
+        self.table.pack(fill='both', expand=True)
+        self._after_id = None
+        self._update()
+
+    def _update(self):
+        for key, values in summary().items():
+            row = [values.get('count', 0)] + [
+                f'{values[column] * 1000:.2f} ms' if column in values else ''
+                for column in self.columns[1:]
+            ]
+            if self.table.exists(key):
+                self.table.item(key, values=row)
+            else:
+                self.table.insert('', tk.END, iid=key, text=key, values=row)
+        self._after_id = self.after(self.refresh, self._update)
+
+    def destroy(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        super().destroy()
@@ -0,0 +1,95 @@
+"""
+blueprint/lod.py: level-of-detail helpers for the chart views
+"""
+
+import numpy as np
+
+
+class Pyramid:
+    """Min/max aggregates of a series at successively halved resolutions.
+
+    Level 0 is the series itself. Each level above it merges pairs of
+    buckets from the level below, so bucket i of level k covers points
+    i * 2**k up to (i + 1) * 2**k. The x values must be sorted.
+    Building costs O(n) and a query O(log n + max_points).
+    """
+
+    def __init__(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        # (bucket start x, bucket min y, bucket max y) per level
+        self.levels = [(x, y, y)]
+        while len(x) > 1:
+            low, high = self.levels[-1][1:]
+            if len(x) % 2:
+                # pad odd levels with their last bucket
+                x, low, high = (np.append(a, a[-1]) for a in (x, low, high))
+            x = x[0::2]
+            self.levels.append((
+                x,
+                np.minimum(low[0::2], low[1::2]),
+                np.maximum(high[0::2], high[1::2])
+            ))
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    @property
+    def x_min(self):
+        return self.levels[0][0][0]
+
+    @property
+    def x_max(self):
+        return self.levels[0][0][-1]
+
+    @property
+    def y_min(self):
+        return self.levels[-1][1][0]
+
+    @property
+    def y_max(self):
+        return self.levels[-1][2][0]
+
+    def query(self, x0, x1, max_points):
+        """Return (x, y, raw) for the part of the series in [x0, x1].
+
+        The finest level that fits max_points is used; raw is True when
+        that is the series itself. Coarser levels give each bucket's
+        min and max at the bucket's start x. One point beyond each end
+        is included so the line runs to the edges of the view.
+        """
+        xs = self.levels[0][0]
+        start = max(0, np.searchsorted(xs, x0, 'left') - 1)
+        stop = min(len(xs), np.searchsorted(xs, x1, 'right') + 1)
+        if stop - start <= max_points:
+            return xs[start:stop], self.levels[0][1][start:stop], True
+
+        level = 1
+        buckets = max(1, max_points // 2)
+        while ((stop - 1) >> level) - (start >> level) + 1 > buckets and (
+            level + 1 < len(self.levels)
+        ):
+            level += 1
+        x, low, high = self.levels[level]
+        first, last = start >> level, ((stop - 1) >> level) + 1
+        return (
+            np.repeat(x[first:last], 2),
+            np.column_stack((low[first:last], high[first:last])).ravel(),
+            False
+        )
+
+
+def bounds(pyramids, anchored=True):
+    """Return the (x0, x1, y0, y1) range spanning every pyramid.
+
+    The y axis starts at zero unless the data goes below it, as the
+    line chart draws it; with anchored=True the x axis does too.
+    """
+    x0 = min(p.x_min for p in pyramids)
+    y0 = min(p.y_min for p in pyramids)
+    if anchored:
+        x0 = min(0.0, x0)
+    return (
+        x0, max(p.x_max for p in pyramids),
+        min(0.0, y0), max(p.y_max for p in pyramids)
+    )
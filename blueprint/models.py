@@ -1,10 +1,16 @@
 """ blueprint/models.py: example data"""
 
-from .constants import FieldTypes as FT
-import tkinter as tk
+import codecs
 
+import numpy as np
 
-from . import views as v
+from .constants import FieldTypes as FT
+from .aggregate import aggregate
+from .cache import QueryCache
+from .dataset import Dataset
+from .feed import FeedClient
+from .sources import TailSource
+import tkinter as tk
 
 
 class myModel:
@@ -13,11 +19,64 @@ class myModel:
         "Notes": {'req': True, 'type': FT.long_string}
     }
 
+    # column specs of the example datasets
+    node_fields = {
+        "Day": {'req': True, 'type': FT.integer},
+        "lab_id": {'req': True, 'type': FT.string},
+        "Average Height (cm)": {'req': True, 'type': FT.decimal}
+    }
+    seed_fields = {
+        "seed_sample": {'req': True, 'type': FT.string},
+        "yield": {'req': True, 'type': FT.integer},
+        "avg_humidity": {'req': True, 'type': FT.decimal},
+        "avg_temperature": {'req': True, 'type': FT.decimal}
+    }
+
+    # datasets are built once, on first use
+    _nodes = None
+    _seeds = None
+
+    def __init__(self, cache_bytes=64 << 20):
+        # path or address -> TailSource or FeedClient being followed
+        self.sources = {}
+        # derived results of query(), keyed by dataset version
+        self.cache = QueryCache(cache_bytes)
+        self._versions = {'nodes': 0, 'seeds': 0}
+
+    ################# QUERIES ########################
+    def query(self, name, op, *args, **kwargs):
+        """Return getattr(self.<name>(), op)(*args, **kwargs), memoized.
+
+        For example query('seeds', 'group_by', 'seed_sample'). Results
+        are cached per dataset version, so any view asking for the same
+        query of the same data gets the same object back; treat it as
+        read-only. Arguments must be hashable to be cached; otherwise
+        the query just runs.
+        """
+        def compute():
+            return getattr(getattr(self, name)(), op)(*args, **kwargs)
+
+        key = (name, self._versions[name], op, args,
+               tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return compute()
+        return self.cache.get(key, compute)
+
+    def _replace(self, name, dataset):
+        """Swap in a new dataset and drop the results derived from it"""
+        setattr(self, f'_{name}', dataset)
+        self._versions[name] += 1
+        self.cache.invalidate(name)
+        return dataset
+
     ############### EXAMPLE DATA #####################
     # views.py LineChart Example Data
 
     def nodes(self):
-        num_nodes = {'A', 'B', 'C'}
+        if self._nodes is not None:
+            return self._nodes
         data = [
     {"Day": 0, "lab_id": "A", "Average Height (cm)": 1.4198750000000000},
     {"Day": 0, "lab_id": "B", "Average Height (cm)": 1.3320000000000000},
@@ -35,11 +94,14 @@ class myModel:
     {"Day": 4, "lab_id": "B", "Average Height (cm)": 2.5},
     {"Day": 4, "lab_id": "C", "Average Height (cm)": 2.2},
 ]
-        return data
+        self._nodes = Dataset.from_records(data, self.node_fields)
+        return self._nodes
 
 # views.py YieldChartView Example Data
 
     def seeds(self):
+        if self._seeds is not None:
+            return self._seeds
         data2 = [
     {"seed_sample": "AXM480", "yield": 11, "avg_humidity": 27.7582142857142857, "avg_temperature": 23.7485714285714286},
     {"seed_sample": "AXM480", "yield": 20, "avg_humidity": 27.2146428571428571, "avg_temperature": 23.8032142857142857},
@@ -52,31 +114,180 @@ class myModel:
     {"seed_sample": "AXM477", "yield": 22, "avg_humidity": 27.5003571428571429, "avg_temperature": 23.7360714285714286},
     {"seed_sample": "AXM479", "yield": 19, "avg_humidity": 26.5550000000000000, "avg_temperature": 23.7632142857142857}
 ]
-        return data2
+        self._seeds = Dataset.from_records(data2, self.seed_fields)
+        return self._seeds
+
+    ################ RAW DATA ########################
+    def load_nodes(self, path, day='day', lab='lab_id', height='height',
+                   processes=None):
+        """Compute nodes() from raw height measurements.
+
+        Heights are averaged per day and lab across a process pool;
+        see blueprint/aggregate.py.
+        """
+        result = aggregate(
+            path, (day, lab), (height,),
+            fields={day: self.node_fields['Day']}, processes=processes
+        )
+        return self._replace('nodes', Dataset(self.node_fields, {
+            "Day": result[day],
+            "lab_id": result[lab],
+            "Average Height (cm)": result[height]
+        }))
+
+    def load_seeds(self, path, seed='seed_sample', plot='plot_id',
+                   crop='yield', humidity='humidity',
+                   temperature='temperature', processes=None):
+        """Compute seeds() from raw plot measurements.
+
+        Each row of the result is one plot: its total yield and its
+        average humidity and temperature.
+        """
+        result = aggregate(
+            path, (seed, plot), (crop, humidity, temperature),
+            processes=processes
+        )
+        return self._replace('seeds', Dataset(self.seed_fields, {
+            "seed_sample": result[seed],
+            "yield": result[f'{crop}_sum'].round(),
+            "avg_humidity": result[humidity],
+            "avg_temperature": result[temperature]
+        }))
+
+    def tail(self, path, fields=None, from_start=True):
+        """Follow a file still being written, e.g. an instrument log.
+
+        Rows are typed by fields, node_fields by default. Poll the
+        returned source with read(), or push it to a view with
+        sources.Follower.
+        """
+        source = TailSource(path, fields or self.node_fields, from_start)
+        self.sources[path] = source
+        return source
+
+    def feed(self, address, fields=None):
+        """Receive rows from a network feed of JSON lines.
+
+        address is (host, port) or a Unix socket path; rows are typed
+        by fields, node_fields by default. The returned client is
+        already connecting and is polled like a tail source.
+        """
+        source = FeedClient(address, fields or self.node_fields).start()
+        self.sources[address] = source
+        return source
+
+    def close(self):
+        """Stop following files and feeds"""
+        for source in self.sources.values():
+            source.close()
+        self.sources.clear()
+
+    ################## STORAGE #######################
+    def save(self, store):
+        """Queue the datasets to be written to a SQLiteStore.
+
+        Returns the store's futures; nothing blocks on the write.
+        """
+        return [
+            store.save('nodes', self.nodes()),
+            store.save('seeds', self.seeds())
+        ]
+
+    def load(self, store):
+        """Replace the datasets with the ones saved in store, if any"""
+        tables = store.tables()
+        if 'nodes' in tables:
+            self._replace('nodes', store.load('nodes', self.node_fields))
+        if 'seeds' in tables:
+            self._replace('seeds', store.load('seeds', self.seed_fields))
 #####################################
 
 
-# class TextToBinary:
-    #     """
-#     Translate Texto into Binary.
+class TextToBinary:
+    """
+    Translate Texto into Binary, and back.
+
+    fields dictionary is a class member variable that 
+    contains all the fields in our model
+
+    Text is translated as its UTF-8 bytes, eight '0'/'1' digits per
+    byte, looked up chunk by chunk in a 256-row table, so a character
+    outside ASCII round-trips too. Long outputs are broken into lines
+    of line_bytes bytes, because Tk's Text widget slows down badly on
+    very long lines; whitespace is ignored when translating back.
+    """
+
+    fields = {
+        "Input": {'req': True, 'type': FT.long_string},
+        "Output": {'req': True, 'type': FT.long_string}
+    }
+
+    # input bytes translated per chunk
+    chunk_size = 1 << 16
+    # bytes per output line, or None for one line
+    line_bytes = 64
+    # the eight ASCII digits of every byte value, one row per value
+    digits = np.unpackbits(
+        np.arange(256, dtype=np.uint8)[:, None], axis=1) + ord('0')
+    whitespace = np.frombuffer(b' \t\r\n', dtype=np.uint8)
 
-#     fields dictionary is a class member variable that 
-#     contains all the fields in our model
+    def __init__(self):
+        if self.line_bytes:
+            # lines must not straddle chunks
+            self.chunk_size -= self.chunk_size % self.line_bytes
 
-#     """
+    def encode(self, text):
+        """Yield (binary chunk, fraction done) pairs for text"""
+        data = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+        for start in range(0, len(data), self.chunk_size):
+            chunk = self.digits[data[start:start + self.chunk_size]]
+            if self.line_bytes:
+                full = len(chunk) // self.line_bytes * self.line_bytes
+                lines = chunk[:full].reshape(-1, self.line_bytes * 8)
+                newlines = np.full((len(lines), 1), ord('\n'), np.uint8)
+                chunk = np.concatenate((
+                    np.hstack((lines, newlines)).ravel(), chunk[full:].ravel()
+                ))
+            yield (chunk.tobytes().decode('ascii'),
+                   min(1.0, (start + self.chunk_size) / len(data)))
 
-#     fields = {
-#         "Input": {'req': True, 'type': FT.long_string},
-#         "Output": {'req': True, 'type': FT.long_string}
-#     }
+    def decode(self, binary):
+        """Yield (text chunk, fraction done) pairs for a string of binary
+        digits; raises ValueError if it is not the encoding of UTF-8 text"""
+        data = np.frombuffer(binary.encode('utf-8'), dtype=np.uint8)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        carry = np.empty(0, dtype=np.uint8)
+        step = self.chunk_size * 8
+        for start in range(0, len(data), step):
+            bits = data[start:start + step]
+            bits = bits[~np.isin(bits, self.whitespace)] - ord('0')
+            if (bits > 1).any():
+                raise ValueError(
+                    'Binary text may only hold 0, 1 and whitespace')
+            bits = np.concatenate((carry, bits))
+            usable = len(bits) // 8 * 8
+            carry = bits[usable:]
+            yield (decoder.decode(np.packbits(bits[:usable]).tobytes()),
+                   min(1.0, (start + step) / len(data)))
+        if len(carry):
+            raise ValueError('Binary text is not a whole number of bytes')
+        # raises if the text ends inside a character
+        decoder.decode(b'', final=True)
 
-#     # def __init__(self):
+    def translate(self, data):
+        """Translate text into binary"""
+        return ''.join(chunk for chunk, _ in self.encode(data['Input']))
 
-#     def translate(self, data):
-#         """Translate text into binary"""
-#         trad = ''.join(format(ord(i), '08b') for i in data['Input'])
-#         # if no text to convert
-#         if data == '':
-#             pass  # do nothing
+    def translate_back(self, data):
+        """Translate binary into text"""
+        return ''.join(chunk for chunk, _ in self.decode(data['Input']))
 
-#         return trad
+    def stream(self, text, reverse=False, *, task):
+        """Translate in a cooperative TaskExecutor job, reporting each
+        chunk to the task as (chunk, fraction done); stops once it is
+        cancelled"""
+        chunks = self.decode(text) if reverse else self.encode(text)
+        for chunk, done in chunks:
+            if task.cancelled:
+                return
+            task.report((chunk, done))
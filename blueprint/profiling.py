@@ -0,0 +1,269 @@
+"""
+blueprint/profiling.py: opt-in profiling of a whole application session
+
+Switched on from the command line of blueprint.py or the environment,
+so a profile can be captured on any machine without editing code:
+
+    --profile cprofile|sample   BLUEPRINT_PROFILE
+    --sample-interval MS        BLUEPRINT_PROFILE_INTERVAL
+    --trace-memory SECONDS      BLUEPRINT_TRACE_MEMORY
+    --profile-dir DIR           BLUEPRINT_PROFILE_DIR
+
+Results are written to the profile directory when the session ends;
+the summaries only list code from the blueprint package.
+
+    -Sampler: samples the stacks of every thread at an interval
+    -MemorySnapshots: periodic tracemalloc snapshots
+    -session: context manager running either around the mainloop
+"""
+
+import collections
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODES = ('cprofile', 'sample')
+
+
+def _in_package(filename):
+    return os.path.abspath(filename).startswith(PACKAGE_DIR + os.sep)
+
+
+def _describe(function):
+    filename, line, name = function
+    return f'{name} ({os.path.relpath(filename)}:{line})'
+
+
+class Sampler:
+    """Statistical profiler: records the stack of every thread each
+    interval seconds.
+
+    Unlike cProfile it also sees the TaskExecutor and feed threads, and
+    its overhead does not grow with the number of calls.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        # (thread name, stack of (file, first line, name)) -> samples
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                if name.startswith('profile-'):
+                    continue  # our own threads
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        (code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[name, tuple(stack)] += 1
+            self.samples += 1
+
+    def hot_functions(self, limit=30):
+        """Return [(own samples, total samples, function)] for package
+        functions, busiest first.
+
+        A function's own samples are those where it was running; its
+        total also counts the samples where it was waiting on a call.
+        """
+        own = collections.Counter()
+        total = collections.Counter()
+        for (_, stack), count in self.stacks.items():
+            for function in set(stack):
+                if _in_package(function[0]):
+                    total[function] += count
+            # charge a sample to the innermost package frame
+            for function in reversed(stack):
+                if _in_package(function[0]):
+                    own[function] += count
+                    break
+        ranked = sorted(total, key=lambda f: (own[f], total[f]), reverse=True)
+        return [(own[f], total[f], f) for f in ranked[:limit]]
+
+    def write(self, directory):
+        """Write samples.folded (for flame graph tools) and samples.txt"""
+        with open(os.path.join(directory, 'samples.folded'), 'w') as fh:
+            for (thread, stack), count in self.stacks.most_common():
+                frames = ';'.join(f'{name} ({os.path.basename(filename)})'
+                                  for filename, _, name in stack)
+                fh.write(f'{thread};{frames} {count}\n')
+        ticks = max(1, self.samples)
+        with open(os.path.join(directory, 'samples.txt'), 'w') as fh:
+            fh.write(f'{self.samples} samples every '
+                     f'{self.interval * 1000:g} ms, all threads\n')
+            fh.write('(own and total are % of sample ticks; '
+                     'a tick samples every thread)\n\n')
+            fh.write(f'{"own %":>7} {"total %":>8}  function\n')
+            for own, total, function in self.hot_functions():
+                fh.write(f'{100 * own / ticks:7.1f} {100 * total / ticks:8.1f}'
+                         f'  {_describe(function)}\n')
+
+
+class MemorySnapshots:
+    """Take a tracemalloc snapshot every interval seconds.
+
+    Only allocations made from package code are kept. Each snapshot's
+    top growth against the previous one goes into the summary.
+    """
+
+    def __init__(self, interval=30.0, frames=10, limit=15):
+        self.interval = interval
+        self.frames = frames
+        self.limit = limit
+        self.reports = []
+        self._first = self._last = None
+        self._started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        tracemalloc.start(self.frames)
+        self._first = self._last = self._take()
+        self._thread = threading.Thread(
+            target=self._run, name='profile-memory', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.snapshot()
+        tracemalloc.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot()
+
+    def _take(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, '*'),
+                               all_frames=True),
+            tracemalloc.Filter(False, __file__, all_frames=True)
+        ])
+
+    def snapshot(self):
+        """Take a snapshot now and report what grew since the last one"""
+        snapshot = self._take()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f'--- {time.monotonic() - self._started:.0f} s: '
+            f'{current / 1e6:.1f} MB traced, peak {peak / 1e6:.1f} MB'
+        ]
+        for stat in snapshot.compare_to(self._last, 'lineno')[:self.limit]:
+            lines.append(f'  {stat}')
+        self.reports.append('\n'.join(lines))
+        self._last = snapshot
+
+    def write(self, directory):
+        """Write memory.txt and the last snapshot as memory.snapshot"""
+        with open(os.path.join(directory, 'memory.txt'), 'w') as fh:
+            fh.write('\n\n'.join(self.reports) + '\n\n')
+            fh.write('--- total growth over the session\n')
+            for stat in self._last.compare_to(
+                self._first, 'traceback'
+            )[:self.limit]:
+                fh.write(f'  {stat}\n')
+                for line in stat.traceback.format(limit=3):
+                    fh.write(f'    {line}\n')
+        self._last.dump(os.path.join(directory, 'memory.snapshot'))
+
+
+def _write_cprofile(profiler, directory):
+    """Write profile.prof for pstats/snakeviz and profile.txt"""
+    profiler.dump_stats(os.path.join(directory, 'profile.prof'))
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    for key in ('cumulative', 'tottime'):
+        out.write(f'=== package functions by {key}\n')
+        stats.sort_stats(key).print_stats(
+            PACKAGE_DIR.replace('\\', '\\\\') + r'.*\.py', 30)
+    with open(os.path.join(directory, 'profile.txt'), 'w') as fh:
+        fh.write(out.getvalue())
+
+
+def add_arguments(parser):
+    """Add the profiling switches to an ArgumentParser; the environment
+    variables give their defaults"""
+    env = os.environ
+    group = parser.add_argument_group('profiling')
+    group.add_argument(
+        '--profile', choices=MODES,
+        default=env.get('BLUEPRINT_PROFILE') or None,
+        help='run the session under cProfile or the sampling profiler')
+    group.add_argument(
+        '--sample-interval', type=float, metavar='MS',
+        default=float(env.get('BLUEPRINT_PROFILE_INTERVAL', 5)),
+        help='ms between samples with --profile sample (default 5)')
+    group.add_argument(
+        '--trace-memory', type=float, metavar='SECONDS',
+        default=float(env.get('BLUEPRINT_TRACE_MEMORY', 0)) or None,
+        help='take a tracemalloc snapshot every SECONDS')
+    group.add_argument(
+        '--profile-dir', metavar='DIR',
+        default=env.get('BLUEPRINT_PROFILE_DIR', 'profile'),
+        help='where results are written on exit (default ./profile)')
+    return group
+
+
+@contextlib.contextmanager
+def session(profile=None, sample_interval=5, trace_memory=None,
+            profile_dir='profile'):
+    """Profile the block as asked and write the results when it ends,
+    even if it raised. With nothing asked this does nothing."""
+    if profile is not None and profile not in MODES:
+        raise ValueError(f'unknown profile mode {profile!r}')
+    if profile is None and not trace_memory:
+        yield
+        return
+
+    profiler = sampler = memory = None
+    if trace_memory:
+        memory = MemorySnapshots(trace_memory)
+        memory.start()
+    if profile == 'sample':
+        sampler = Sampler(sample_interval / 1000)
+        sampler.start()
+    elif profile == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        if memory is not None:
+            memory.stop()
+        os.makedirs(profile_dir, exist_ok=True)
+        if profiler is not None:
+            _write_cprofile(profiler, profile_dir)
+        if sampler is not None:
+            sampler.write(profile_dir)
+        if memory is not None:
+            memory.write(profile_dir)
+        print(f'profile written to {os.path.abspath(profile_dir)}',
+              file=sys.stderr)
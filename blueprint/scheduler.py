@@ -0,0 +1,75 @@
+"""
+blueprint/scheduler.py: coalesced redraws for the chart views
+"""
+
+import time
+
+
+class RenderScheduler:
+    """Flush dirty views at most once per frame.
+
+    Views registered here call mark_dirty() instead of redrawing. The
+    scheduler then calls each dirty view's render() once, from an
+    after_idle (or after, to respect max_fps) callback on the widget's
+    mainloop. Any number of updates between two frames costs one redraw.
+    """
+
+    def __init__(self, widget, max_fps=30):
+        self.widget = widget
+        self.max_fps = max_fps
+        self._dirty = {}  # dict as an ordered set of views
+        self._after_id = None
+        self._last_flush = 0.0
+
+    def register(self, view):
+        """Route the redraws of view through this scheduler"""
+        view.scheduler = self
+        return view
+
+    def mark_dirty(self, view):
+        """Queue view for the next frame"""
+        self._dirty[view] = None
+        if self._after_id is not None:
+            return
+        delay = self._last_flush + 1 / self.max_fps - time.monotonic()
+        if delay > 0:
+            self._after_id = self.widget.after(
+                max(1, round(delay * 1000)), self.flush)
+        else:
+            self._after_id = self.widget.after_idle(self.flush)
+
+    def flush(self):
+        """Render every dirty view now"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._last_flush = time.monotonic()
+        # views dirtied while rendering wait for the next frame
+        dirty, self._dirty = self._dirty, {}
+        for view in dirty:
+            if view.winfo_exists():
+                view.render()
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._dirty.clear()
+
+
+class Renderable:
+    """Mixin for views that can redraw through a RenderScheduler.
+
+    Subclasses implement render(); changes call request_render().
+    """
+
+    scheduler = None
+
+    def request_render(self):
+        if self.scheduler is None:
+            self.render()
+        else:
+            self.scheduler.mark_dirty(self)
+
+    def render(self):
+        raise NotImplementedError
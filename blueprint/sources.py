@@ -0,0 +1,167 @@
+"""
+blueprint/sources.py: data sources that follow files still being written
+"""
+
+import csv
+import json
+import mmap
+import os
+
+import numpy as np
+
+from .dataset import Dataset
+
+
+def _fits(record, fields):
+    """True when record has a value of the right type for every field"""
+    try:
+        for key, spec in fields.items():
+            np.asarray(record[key], dtype=Dataset.dtypes[spec['type']])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return True
+
+
+def to_dataset(records, fields=None):
+    """Build a Dataset from decoded records, leaving out the bad ones.
+
+    Returns (dataset, number of records left out); dataset is None when
+    no record was usable. Without fields, the first record's keys are
+    the fields. Records are only checked one by one when the batch as a
+    whole fails to convert.
+    """
+    try:
+        return Dataset.from_records(records, fields), 0
+    except (AttributeError, KeyError, TypeError, ValueError):
+        pass
+    good = [record for record in records if isinstance(record, dict)]
+    if good and fields is None:
+        fields = Dataset.from_records(good[:1]).fields
+    good = [record for record in good if _fits(record, fields)]
+    dropped = len(records) - len(good)
+    if not good:
+        return None, dropped
+    return Dataset.from_records(good, fields), dropped
+
+
+class TailSource:
+    """Read the records appended to a CSV or JSON lines file.
+
+    The source keeps its byte offset, so each read() costs only the
+    bytes added since the last one. An unfinished last line is held back
+    until its newline arrives. Large appends are read through mmap. If
+    the file shrinks, it is assumed to have been rotated and is read
+    again from the start. Lines that can't be parsed, and records
+    missing a field or holding a value of the wrong type, are skipped
+    and counted in bad_records.
+    """
+
+    # appends at least this large are read through mmap
+    mmap_threshold = 1 << 20
+
+    def __init__(self, path, fields=None, from_start=True):
+        self.path = path
+        self.fields = fields
+        self.format = (
+            'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.offset = 0 if from_start else os.path.getsize(path)
+        self.bad_records = 0
+        self._partial = b''
+        self._header = None
+        if not from_start and self.format == 'csv':
+            with open(path, 'rb') as fh:
+                self._header = next(csv.reader(
+                    [fh.readline().decode('utf-8')]), None)
+
+    def _read_new_bytes(self):
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # truncated or replaced; start over
+            self.offset = 0
+            self._partial = b''
+            self._header = None
+        if size == self.offset:
+            return b''
+        with open(self.path, 'rb') as fh:
+            if size - self.offset >= self.mmap_threshold:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = mm[self.offset:size]
+            else:
+                fh.seek(self.offset)
+                data = fh.read(size - self.offset)
+        self.offset += len(data)
+        return data
+
+    def read(self):
+        """Return a Dataset of the complete records added since the last
+        read, or None when there are none"""
+        data = self._partial + self._read_new_bytes()
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        lines = [line.decode('utf-8').rstrip('\r') for line in lines]
+        lines = [line for line in lines if line]
+        if self.format == 'csv':
+            if self._header is None and lines:
+                self._header = next(csv.reader([lines.pop(0)]))
+            records = [
+                dict(zip(self._header, row)) for row in csv.reader(lines)
+            ]
+        else:
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    self.bad_records += 1
+        if not records:
+            return None
+        dataset, dropped = to_dataset(records, self.fields)
+        self.bad_records += dropped
+        return dataset
+
+    def close(self):
+        """Nothing to release; the file is only open during read()"""
+
+
+class Follower:
+    """Poll a source from the Tk mainloop and push what it read.
+
+    At most `rate` times a second, everything read since the last push
+    goes to callback as one batch, e.g. LineChartView.append. An error
+    in a poll is reported like any failed Tk callback and polling goes
+    on.
+    """
+
+    def __init__(self, widget, source, callback, rate=10):
+        self.widget = widget
+        self.source = source
+        self.callback = callback
+        self.rate = rate
+        self._after_id = None
+        self._running = False
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._poll()
+
+    def _poll(self):
+        self._after_id = None
+        try:
+            delta = self.source.read()
+            if delta is not None:
+                self.callback(delta)
+        except Exception as e:
+            self.widget.report_callback_exception(
+                type(e), e, e.__traceback__)
+        finally:
+            # the callback may have stopped us
+            if self._running:
+                self._after_id = self.widget.after(
+                    max(1, round(1000 / self.rate)), self._poll)
+
+    def stop(self):
+        self._running = False
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
@@ -0,0 +1,72 @@
+"""
+blueprint/spatial.py: spatial index for picking points under the mouse
+"""
+
+import numpy as np
+
+
+class GridIndex:
+    """Uniform grid over a set of 2-D points.
+
+    The bounding box is cut into about len(points) / per_cell square-ish
+    cells. Points are sorted by cell id once, so the points of a row of
+    cells are a slice found by binary search: building costs
+    O(n log n) and a lookup O(log n) plus the points near the query.
+    """
+
+    def __init__(self, x, y, per_cell=4):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        count = len(self.x)
+        side = max(1, int(np.sqrt(count / per_cell)))
+        self.columns = self.rows = side
+        if count:
+            self.x0, self.y0 = self.x.min(), self.y.min()
+            width = self.x.max() - self.x0
+            height = self.y.max() - self.y0
+        else:
+            self.x0 = self.y0 = width = height = 0.0
+        # a zero span would put every point in one cell anyway
+        self.cell_width = width / side or 1.0
+        self.cell_height = height / side or 1.0
+        ids = (self._row(self.y) * self.columns + self._column(self.x))
+        self.order = np.argsort(ids, kind='stable')
+        self.ids = ids[self.order]
+
+    def __len__(self):
+        return len(self.x)
+
+    def _column(self, x):
+        column = np.floor((np.asarray(x) - self.x0) / self.cell_width)
+        return np.clip(column, 0, self.columns - 1).astype(np.int64)
+
+    def _row(self, y):
+        row = np.floor((np.asarray(y) - self.y0) / self.cell_height)
+        return np.clip(row, 0, self.rows - 1).astype(np.int64)
+
+    def nearest(self, x, y, rx, ry):
+        """Return (index, distance) of the point nearest to (x, y).
+
+        Only points inside the ellipse with radii rx and ry count; the
+        distance is measured in those radii, so it is at most 1. The
+        radii let the caller pick in screen units on axes with unlike
+        scales. Returns (None, inf) when no point is close enough.
+        """
+        if not len(self) or rx <= 0 or ry <= 0:
+            return None, np.inf
+        first, last = self._column(x - rx), self._column(x + rx)
+        candidates = []
+        for row in range(self._row(y - ry), self._row(y + ry) + 1):
+            start = np.searchsorted(self.ids, row * self.columns + first)
+            stop = np.searchsorted(
+                self.ids, row * self.columns + last, 'right')
+            candidates.append(self.order[start:stop])
+        candidates = np.concatenate(candidates)
+        if not len(candidates):
+            return None, np.inf
+        distance = np.hypot(
+            (self.x[candidates] - x) / rx, (self.y[candidates] - y) / ry)
+        best = np.argmin(distance)
+        if distance[best] > 1:
+            return None, np.inf
+        return int(candidates[best]), float(distance[best])
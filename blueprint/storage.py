@@ -0,0 +1,247 @@
+"""
+blueprint/storage.py: SQLite persistence for datasets and form records
+"""
+
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from .constants import FieldTypes as FT
+from .dataset import Dataset
+
+
+def _quote(name):
+    """Quote an SQL identifier; field names may hold spaces and brackets"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteStore:
+    """Store datasets and form records in an SQLite file.
+
+    Every write is queued to one background thread, which commits all
+    writes waiting in the queue as one transaction, so callers never
+    wait on disk I/O. Each write runs in its own savepoint, so one that
+    fails is rolled back alone and only its future gets the error. The
+    database runs in WAL mode, so reads on other connections proceed
+    while the writer commits. Reads are paged, and a large table never
+    has to be loaded at once.
+
+    Table columns are typed from the FieldTypes of the fields spec.
+    """
+
+    # this dictionary translates our model's field types
+    # into SQLite column types
+    sql_types = {
+        FT.string: 'TEXT',
+        FT.string_list: 'TEXT',
+        FT.short_string_list: 'TEXT',
+        FT.iso_date_string: 'TEXT',
+        FT.long_string: 'TEXT',
+        FT.decimal: 'REAL',
+        FT.integer: 'INTEGER',
+        FT.boolean: 'INTEGER'
+    }
+
+    def __init__(self, path, batch_size=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write_loop, name='SQLiteStore writer', daemon=True)
+        self._writer.start()
+
+    #################
+    # writes, async #
+    #################
+    def save(self, name, dataset, replace=True):
+        """Queue a dataset to be written to table name.
+
+        With replace=True the table's old rows are deleted in the same
+        transaction. Returns a Future that resolves once committed.
+        """
+        return self._submit(self._write_dataset, name, dataset, replace)
+
+    def save_record(self, name, fields, record):
+        """Queue one dict record, e.g. from MyForm.get(), to be appended"""
+        dataset = Dataset(fields, {key: [record[key]] for key in fields})
+        return self._submit(self._write_dataset, name, dataset, False)
+
+    def _submit(self, fn, *args):
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def _write_loop(self):
+        # transactions are managed by hand, see _commit()
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        running = True
+        while running:
+            jobs = [self._queue.get()]
+            # commit whatever else is already waiting in the same go
+            while True:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in jobs:
+                running = False
+                jobs = [job for job in jobs if job is not None]
+            if jobs:
+                self._commit(connection, jobs)
+        connection.close()
+
+    def _commit(self, connection, jobs):
+        """Run jobs in one transaction, each inside a savepoint"""
+        # a cancelled future's write is dropped; the rest can't be
+        # cancelled from here on
+        jobs = [job for job in jobs if job[0].set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        errors = {}
+        try:
+            connection.execute('BEGIN')
+            for future, fn, args in jobs:
+                connection.execute('SAVEPOINT job')
+                try:
+                    fn(connection, *args)
+                except Exception as e:
+                    connection.execute('ROLLBACK TO job')
+                    errors[future] = e
+                connection.execute('RELEASE job')
+            connection.execute('COMMIT')
+        except Exception as e:
+            # the transaction itself failed; nothing was written
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            for future, *_ in jobs:
+                future.set_exception(e)
+            return
+        for future, *_ in jobs:
+            if future in errors:
+                future.set_exception(errors[future])
+            else:
+                future.set_result(None)
+
+    def _write_dataset(self, connection, name, dataset, replace):
+        table = _quote(name)
+        columns = ', '.join(
+            f'{_quote(key)} {self.sql_types[spec["type"]]}'
+            for key, spec in dataset.fields.items()
+        )
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns})')
+        if replace:
+            connection.execute(f'DELETE FROM {table}')
+
+        keys = list(dataset.fields)
+        insert = (
+            f'INSERT INTO {table} ({", ".join(map(_quote, keys))}) '
+            f'VALUES ({", ".join("?" * len(keys))})'
+        )
+        arrays = [self._to_sql(dataset[key]) for key in keys]
+        for start in range(0, len(dataset), self.batch_size):
+            stop = start + self.batch_size
+            connection.executemany(
+                insert, zip(*(array[start:stop].tolist() for array in arrays))
+            )
+
+    @staticmethod
+    def _to_sql(column):
+        if column.dtype.kind == 'M':
+            return column.astype(str)
+        if column.dtype.kind == 'b':
+            return column.astype(np.int64)
+        return column
+
+    ################
+    # reads, paged #
+    ################
+    def _read_connection(self):
+        return sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+
+    def tables(self):
+        if not os.path.exists(self.path):
+            # nothing written yet
+            return []
+        with contextlib.closing(self._read_connection()) as connection:
+            return [row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    def count(self, name):
+        with contextlib.closing(self._read_connection()) as connection:
+            return connection.execute(
+                f'SELECT COUNT(*) FROM {_quote(name)}').fetchone()[0]
+
+    def pages(self, name, fields, page_size=50000):
+        """Yield table name as Datasets of at most page_size rows.
+
+        Pages are fetched by rowid range, so each one costs the same
+        however deep into the table it is.
+        """
+        connection = self._read_connection()
+        try:
+            for columns in self._pages(connection, name, fields, page_size):
+                yield Dataset(fields, columns)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _pages(connection, name, fields, page_size):
+        """Yield {field: tuple of values} per page of table name"""
+        keys = list(fields)
+        query = (
+            f'SELECT rowid, {", ".join(map(_quote, keys))} '
+            f'FROM {_quote(name)} WHERE rowid > ? ORDER BY rowid LIMIT ?'
+        )
+        last = 0
+        while True:
+            rows = connection.execute(query, (last, page_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield dict(zip(keys, list(zip(*rows))[1:]))
+
+    def load(self, name, fields, page_size=50000):
+        """Read a whole table into one Dataset.
+
+        The columns are allocated once, from the row count, and filled
+        page by page, so the table is never held twice.
+        """
+        connection = self._read_connection()
+        try:
+            # one read transaction, so the count matches the pages
+            connection.execute('BEGIN')
+            count = connection.execute(
+                f'SELECT COUNT(*) FROM {_quote(name)}').fetchone()[0]
+            columns = {
+                key: np.empty(count, dtype=Dataset.dtypes[spec['type']])
+                for key, spec in fields.items()
+            }
+            # one str object per distinct value of the interned columns
+            interned = {
+                key: {} for key, spec in fields.items()
+                if spec['type'] in Dataset.categorical
+            }
+            start = 0
+            for page in self._pages(connection, name, fields, page_size):
+                stop = start + len(next(iter(page.values())))
+                for key, values in page.items():
+                    if key in interned:
+                        values = [
+                            interned[key].setdefault(v, v) for v in values]
+                    columns[key][start:stop] = values
+                start = stop
+        finally:
+            connection.close()
+        return Dataset(fields, columns)
+
+    def close(self):
+        """Finish the queued writes and stop the writer thread"""
+        self._queue.put(None)
+        self._writer.join()
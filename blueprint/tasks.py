@@ -0,0 +1,154 @@
+"""
+blueprint/tasks.py: background work that reports back to the Tk mainloop
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import (
+    CancelledError,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor
+)
+
+
+class Task:
+    """Handle for a job submitted to a TaskExecutor.
+
+    The callbacks run on the Tk thread. A cancelled task never calls
+    them, even if its job was already running and finishes anyway.
+    """
+
+    def __init__(self, executor, on_done=None, on_error=None,
+                 on_progress=None):
+        self._executor = executor
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        """True once cancel() was called; long jobs should check it"""
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Cancel the task.
+
+        A job that has not started yet is dropped from the pool. One
+        already running keeps going unless it checks `cancelled`.
+        """
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def report(self, value):
+        """Send a progress value to on_progress; safe from any thread"""
+        if self.on_progress and not self.cancelled:
+            self._executor._results.put((self, 'progress', value))
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+class TaskExecutor:
+    """Run callables in a thread or process pool off the Tk thread.
+
+    Results, errors and progress reports come back through a
+    thread-safe queue. The owning widget drains that queue with after()
+    while tasks are pending, so every callback runs on the Tk thread.
+    """
+
+    # ms between checks of the result queue
+    poll_interval = 20
+    # seconds of callbacks per check; the rest waits for the next one,
+    # so a flood of progress reports can't freeze the UI
+    drain_budget = 0.02
+
+    def __init__(self, widget, max_workers=None, processes=False):
+        self.widget = widget
+        pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._pool = pool_class(max_workers=max_workers)
+        self._results = queue.Queue()
+        self._pending = set()
+        self._after_id = None
+
+    @property
+    def busy(self):
+        return bool(self._pending)
+
+    def submit(self, fn, *args, on_done=None, on_error=None,
+               on_progress=None, cooperative=False, **kwargs):
+        """Run fn(*args, **kwargs) in the pool and return its Task.
+
+        on_done receives the result and on_error the exception. Without
+        on_error, an exception is reported like any failed Tk callback.
+        With cooperative=True the job is also passed the Task as `task`,
+        so it can call task.report() and check task.cancelled. This
+        only works with thread pools, because a Task can't be pickled.
+        """
+        task = Task(self, on_done, on_error, on_progress)
+        if cooperative:
+            kwargs['task'] = task
+        return self._track(task, self._pool.submit(fn, *args, **kwargs))
+
+    def watch(self, future, on_done=None, on_error=None):
+        """Run callbacks on the Tk thread when an outside future resolves,
+        e.g. one returned by SQLiteStore.save()"""
+        return self._track(Task(self, on_done, on_error), future)
+
+    def _track(self, task, future):
+        task.future = future
+        self._pending.add(task)
+        future.add_done_callback(
+            lambda future: self._results.put((task, 'done', future))
+        )
+        self._schedule()
+        return task
+
+    def _schedule(self):
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.poll_interval, self._drain)
+
+    def _drain(self):
+        """Run the callbacks for what came back, for up to drain_budget"""
+        self._after_id = None
+        deadline = time.perf_counter() + self.drain_budget
+        while time.perf_counter() < deadline:
+            try:
+                task, kind, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'done':
+                self._pending.discard(task)
+            if task.cancelled:
+                continue
+            if kind == 'progress':
+                task.on_progress(value)
+                continue
+            try:
+                result = value.result()
+            except CancelledError:
+                continue
+            except Exception as e:
+                if task.on_error:
+                    task.on_error(e)
+                else:
+                    self.widget.report_callback_exception(
+                        type(e), e, e.__traceback__)
+            else:
+                if task.on_done:
+                    task.on_done(result)
+        if self._pending or not self._results.empty():
+            self._schedule()
+
+    def shutdown(self):
+        """Cancel every pending task and stop the pool"""
+        for task in list(self._pending):
+            task.cancel()
+        self._pending.clear()
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
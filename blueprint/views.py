@@ -2,18 +2,40 @@
   blueprint/views.py: form containing widgets
 """
 
+import collections
+import colorsys
+import functools
+import itertools
 import tkinter as tk
 from tkinter import ttk
 
+import numpy as np
+
+from . import instrument
 from . import widgets as w
+from . import lod
+from .buffers import RingBuffer
+from .dataset import Dataset
+from .scheduler import Renderable
+from .spatial import GridIndex
 from .constants import FieldTypes as FT
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import (
-  FigureCanvasTkAgg,
-  NavigationToolbar2Tk
-)
-import matplotlib
-matplotlib.use('TkAgg')
+
+
+@functools.lru_cache(maxsize=None)
+def _matplotlib():
+  """Import matplotlib on first use
+
+  matplotlib takes longer to import than the rest of the application
+  takes to start, so it is only loaded once a YieldChartView is created.
+  """
+  import matplotlib
+  matplotlib.use('TkAgg')
+  from matplotlib.figure import Figure
+  from matplotlib.backends.backend_tkagg import (
+    FigureCanvasTkAgg,
+    NavigationToolbar2Tk
+  )
+  return Figure, FigureCanvasTkAgg, NavigationToolbar2Tk
 
 
 class MyForm(tk.Frame):
@@ -22,6 +44,12 @@ class MyForm(tk.Frame):
     - self._vars = Create a dictionary to hold all out variable objects 
     - _add_frame = instance method that add a new label frame. Pass in 
                    label text and optionally a number of columns.
+    - on_save = optional callback for the Save button; the form has
+                no Save button without one.
+    - translator = optional TextToBinary model; its Input and Output
+                   fields get text boxes and the translate buttons are
+                   shown. Output is read-only and filled by the
+                   application.
 
     """
 
@@ -43,11 +71,15 @@ class MyForm(tk.Frame):
             frame.columnconfigure(i, weight=1)
         return frame
 
-    def __init__(self, parent, model, *args, **kwargs):
+    def __init__(
+        self, parent, model, *args, translator=None, on_save=None, **kwargs
+    ):
         super().__init__(parent, *args, **kwargs)
 
         self.model = model
-        fields = self.model.fields
+        fields = dict(self.model.fields)
+        if translator is not None:
+            fields.update(translator.fields)
 
         self._vars = {  # hold all variable objects
             key: self.var_types[spec['type']]()
@@ -77,6 +109,37 @@ class MyForm(tk.Frame):
         # text to display data from form
         self.output_var = tk.StringVar()
 
+        # the model's own field, which Save stores
+        frame = self._add_frame('Notes', cols=1)
+        frame.grid(row=1)
+        notes = w.LabelInput(
+            frame, 'Notes', input_class=w.BoundText,
+            var=self._vars['Notes'],
+            input_args={"width": 100, "height": 4}
+        )
+        notes.grid(row=0, column=0, sticky=tk.W + tk.E)
+        # text boxes whose edits reach their variable after a pause
+        self._texts = [notes.input]
+
+        self.output = None  # Output text box, with a translator
+        if translator is not None:
+            frame = self._add_frame('Translate', cols=2)
+            frame.grid(row=2)
+            self.input = w.LabelInput(
+                frame, 'Input', input_class=w.BoundText,
+                var=self._vars['Input'],
+                input_args={"width": 50, "height": 8}
+            )
+            self.input.grid(row=0, column=0)
+            self._texts.append(self.input.input)
+            output = w.LabelInput(
+                frame, 'Output', input_class=w.BoundText,
+                var=self._vars['Output'],
+                input_args={"width": 50, "height": 8, "state": tk.DISABLED}
+            )
+            output.grid(row=0, column=1)
+            self.output = output.input
+
         ###########
         # buttons #
         ###########
@@ -87,41 +150,68 @@ class MyForm(tk.Frame):
         # pass instance methods as callback commands
         self.transbutton = ttk.Button(
             buttons, text="Text to Binary", command=self._on_trans)
-        # self.transbutton.pack(side=tk.RIGHT)
-
-        self.transbutton = ttk.Button(
-            buttons, text="Binary to Text", command=self._on_trans, state='disabled')
-        # self.transbutton.pack(side=tk.RIGHT)
+        self.backbutton = ttk.Button(
+            buttons, text="Binary to Text", command=self._on_back)
+        if translator is not None:
+            self.backbutton.pack(side=tk.RIGHT)
+            self.transbutton.pack(side=tk.RIGHT)
 
-        # self.savebutton = ttk.Button(
-        #     buttons, text="Save", command=self.master._on_save)  # on parent
-        # self.savebutton.pack(side=tk.RIGHT)
+        self.savebutton = None
+        if on_save is not None:
+            self.savebutton = ttk.Button(
+                buttons, text="Save", command=on_save)  # e.g. on parent
+            self.savebutton.pack(side=tk.RIGHT)
         self.resetbutton = ttk.Button(
             buttons, text="Reset", command=self.reset)  # on this class
         # self.resetbutton.pack(side=tk.RIGHT)
 
+    def batch_update(self):
+        """Context manager that holds back the widgets' trace callbacks.
+
+        Variables can be written freely inside the block; each widget
+        then updates its state once, from the final values, on exit:
+
+            with form.batch_update():
+                ...
+        """
+        return w.batch()
+
+    def set(self, data):
+        """Load a mapping of field values into the form in one batch"""
+        with self.batch_update():
+            for key, value in data.items():
+                self._vars[key].set(value)
+
+    @instrument.timed()
     def reset(self):
         """Reset entries. Set all variables to empty string"""
-        # activate widget
-        self._disable_var.set(False)
-        # self.set_output_state(tk.NORMAL)
-
-        # reset data
-        for var in self._vars.values():
-            if isinstance(var, tk.BooleanVar):
-                # uncheck checkbox
-                var.set(False)
-            else:
-                # set inputs to empty string
-                var.set('')
-                # set data label to empty string
-                # self.output_var.set('')
-        # disable widget
-        self._disable_var.set(True)
-        # self.set_output_state(tk.DISABLED)
+        with self.batch_update():
+            # activate widget
+            self._disable_var.set(False)
+            # self.set_output_state(tk.NORMAL)
+
+            # reset data
+            for var in self._vars.values():
+                if isinstance(var, tk.BooleanVar):
+                    # uncheck checkbox
+                    var.set(False)
+                else:
+                    # set inputs to empty string
+                    var.set('')
+                    # set data label to empty string
+                    # self.output_var.set('')
+            # disable widget
+            self._disable_var.set(True)
+            # self.set_output_state(tk.DISABLED)
+
+    def sync(self):
+        """Push edits still waiting in the text boxes to the variables"""
+        for text in self._texts:
+            text.sync()
 
     def get(self):
         """Retrieve data from the form so it can be saved or used"""
+        self.sync()
         data = {}
         for key, variable in self._vars.items():
             try:
@@ -150,29 +240,226 @@ class MyForm(tk.Frame):
     #     return None
     #########################################
 
+    @instrument.timed()
     def _on_trans(self):
+        self.sync()
         self.event_generate('<<TranslateText>>')
         # self._disable_var.set(False)
 
+    @instrument.timed()
+    def _on_back(self):
+        self.sync()
+        self.event_generate('<<TranslateBinary>>')
+
+
+class VirtualForm(tk.Frame):
+    """Scrolling input form for schemas with thousands of fields
+
+    Only the rows in view have widgets: a fixed pool of LabelInput
+    widgets is rebound to whichever fields scroll into view. Values live
+    in a plain dict of changes over the field defaults rather than in
+    one Tk variable per field, so get() and reset() cost O(changed
+    fields) and building the form costs O(visible rows).
+
+    Boolean fields get a Checkbutton, every other type an Entry.
+    """
+
+    row_height = 48
+
+    def __init__(self, parent, model, visible_rows=12, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+
+        self.model = model
+        self.fields = self.model.fields
+        self._keys = list(self.fields)
+        # same empty values as MyForm.reset()
+        self._defaults = {
+            key: False if spec['type'] == FT.boolean else ''
+            for key, spec in self.fields.items()
+        }
+        self._changes = {}  # field -> value the user entered
+        self._first = 0     # index of the top row in view
+        self._bound = {}    # pooled row -> field it shows
+        self._loading = False
+        self.visible_rows = visible_rows
+
+        self.columnconfigure(0, weight=1)
+        self.body = ttk.Frame(self, height=visible_rows * self.row_height)
+        self.body.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
+        self.scrollbar = ttk.Scrollbar(
+            self, orient=tk.VERTICAL, command=self._yview)
+        self.scrollbar.grid(row=0, column=1, sticky=tk.N + tk.S)
+
+        # one pool per kind of input, each big enough to fill the view
+        self._pools = {
+            'entry': [
+                self._make_row(tk.StringVar(), ttk.Entry)
+                for _ in range(visible_rows)
+            ],
+            'check': [
+                self._make_row(tk.BooleanVar(), ttk.Checkbutton)
+                for _ in range(visible_rows)
+            ]
+        }
+        for widget in (self, self.body):
+            self._bind_wheel(widget)
+        self._refresh()
+
+    def _make_row(self, var, input_class):
+        row = w.LabelInput(self.body, '', var=var, input_class=input_class)
+        var.trace_add('write', lambda *_: self._on_edit(row))
+        self._bind_wheel(row.input)
+        return row
+
+    def _bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', self._on_wheel)
+        widget.bind('<Button-4>', self._on_wheel)
+        widget.bind('<Button-5>', self._on_wheel)
+
+    def _on_wheel(self, event):
+        step = -1 if event.num == 4 or event.delta > 0 else 1
+        self._scroll_to(self._first + step * 3)
+
+    def _yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, what)"""
+        if args[0] == 'moveto':
+            self._scroll_to(round(float(args[1]) * len(self._keys)))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible_rows
+            self._scroll_to(self._first + step)
+
+    def _scroll_to(self, first):
+        first = max(0, min(first, len(self._keys) - self.visible_rows))
+        if first != self._first:
+            self._first = first
+            self._refresh()
+
+    def _refresh(self):
+        """Rebind the pooled rows to the fields now in view"""
+        self._loading = True
+        try:
+            used = {kind: 0 for kind in self._pools}
+            self._bound.clear()
+            visible = self._keys[self._first:self._first + self.visible_rows]
+            for slot, key in enumerate(visible):
+                kind = (
+                    'check' if self.fields[key]['type'] == FT.boolean
+                    else 'entry'
+                )
+                row = self._pools[kind][used[kind]]
+                used[kind] += 1
+                self._bound[row] = key
+                if kind == 'check':
+                    row.input.configure(text=key)
+                else:
+                    row.label.configure(text=key)
+                row.variable.set(self._changes.get(key, self._defaults[key]))
+                row.place(
+                    x=0, y=slot * self.row_height, relwidth=1,
+                    height=self.row_height
+                )
+            for kind, pool in self._pools.items():
+                for row in pool[used[kind]:]:
+                    row.place_forget()
+        finally:
+            self._loading = False
 
-class LineChartView(tk.Canvas):
-  """A generic view for plotting a line chart"""
+        total = len(self._keys) or 1
+        self.scrollbar.set(
+            self._first / total,
+            min(1, (self._first + self.visible_rows) / total)
+        )
+
+    def _on_edit(self, row):
+        """Copy an edit from a pooled row into the backing store"""
+        if self._loading or row not in self._bound:
+            return
+        key = self._bound[row]
+        try:
+            value = row.variable.get()
+        except tk.TclError:
+            return
+        if value == self._defaults[key]:
+            self._changes.pop(key, None)
+        else:
+            self._changes[key] = value
+
+    def reset(self):
+        """Reset entries to their empty values"""
+        self._changes.clear()
+        self._refresh()
+
+    def get(self):
+        """Retrieve the form data as a mapping of every field.
+
+        Only changed fields are converted; the rest come straight from
+        the defaults, so the cost is O(changed fields).
+        """
+        data = {}
+        for key, value in self._changes.items():
+            field_type = self.fields[key]['type']
+            try:
+                if field_type == FT.decimal:
+                    value = float(value)
+                elif field_type == FT.integer:
+                    value = int(value)
+            except ValueError as e:
+                # create error message
+                message = f'Error in field: {key}. Data not saved!'
+                raise ValueError(message) from e
+            data[key] = value
+        return collections.ChainMap(data, self._defaults)
+
+
+class LineChartView(Renderable, tk.Canvas):
+  """A generic view for plotting a line chart
+
+  Each series lives in a fixed-capacity ring buffer, so the chart can
+  follow a live feed through `append` and `extend` without its memory
+  or redraw cost growing with the length of the history. Pass a
+  RenderScheduler as `scheduler` to batch line updates into frames.
+
+  All series share one set of axes. The mouse wheel zooms the x axis,
+  dragging pans it and a double-click shows all data again; each redraw
+  reads a min/max pyramid so its cost follows the plot width, not the
+  number of points.
+
+  There is no limit on the number of series: colors past `colors` are
+  generated. Line items for new series are created together at the
+  next render, and the legend is text drawn over the plot with items
+  only for the rows in view; the wheel over it scrolls it. Clicking a
+  legend row hides or shows its series.
+  Every line is tagged 'line' and with its series_tag(), and more tags
+  can be added with tag_series(), so restyle() and set_visible() change
+  a whole group of lines with one canvas call.
+  """
 
   margin = 2
+  # the first series' colors; more are generated, see series_color()
   colors = [
     'red', 'orange', 'yellow', 'green',
     'blue', 'purple', 'violet',
-    # add more for more complex plots
   ]
+  background = 'lightgrey'
+  plot_background = '#555'
+  line_width = 4
+  legend_row_height = 20
+  hidden_color = '#888'
+  # points kept per series; a longer initial series sets its own size
+  capacity = 10000
 
   def __init__(
     self, parent, data, plot_size,
-    x_field, y_field, plot_by_field
+    x_field, y_field, plot_by_field, capacity=None, scheduler=None
   ):
     self.data = data
     self.x_field = x_field
     self.y_field = y_field
     self.plot_by_field = plot_by_field
+    if capacity:
+      self.capacity = capacity
 
     # calculate view size
     self.plot_width, self.plot_height = plot_size
@@ -181,7 +468,7 @@ class LineChartView(tk.Canvas):
 
     super().__init__(
       parent, width=view_width,
-      height=view_height, background='lightgrey'
+      height=view_height, background=self.background
     )
     # Draw chart
     self.origin = (self.margin, view_height - self.margin)
@@ -205,79 +492,760 @@ class LineChartView(tk.Canvas):
       text=y_field, angle=90, anchor='s'
     )
     self.plot_area = tk.Canvas(
-      self, background='#555',
+      self, background=self.plot_background,
       width=self.plot_width, height=self.plot_height
     )
     self.create_window(
       self.origin, window=self.plot_area, anchor='sw'
     )
 
-    # Draw legend and lines
-    plot_names = sorted(set([
-      row[self.plot_by_field]
-      for row in self.data
-    ]))
+    self._buffers = {}   # series name -> RingBuffer of (x, y)
+    self._lines = {}     # series name -> canvas line item
+    self._names = []     # series names, in the order they were added
+    self._colors = {}    # series name -> color
+    self._tags = {}      # series name -> tags of its line
+    self._hidden = set()
+    self._new_lines = []  # series whose line the next render creates
+    self._line_names = {}  # canvas line item -> series name
+    self._pyramids = {}  # series name -> lod.Pyramid, built on demand
+    # series name -> points added since the last render,
+    # or None when the whole line must be redrawn
+    self._stale = {}
+    # (x0, x1) picked by zoom/pan, or None to follow the data
+    self._zoom = None
+    # (x0, x1, y0, y1) the lines are currently drawn at
+    self._drawn_view = None
+    self._drag_x = None
+    if scheduler is not None:
+      scheduler.register(self)
+
+    # zoom with the wheel, pan by dragging, double-click to reset
+    for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+      self.plot_area.bind(sequence, self._on_wheel)
+    self.plot_area.bind('<ButtonPress-1>', self._on_press)
+    self.plot_area.bind('<B1-Motion>', self._on_drag)
+    self.plot_area.bind('<Double-Button-1>', self.reset_view)
+
+    # legend: a pool of text items over the lines, rebound to the rows
+    # in view; only the text covers the plot
+    self._legend_rows = [
+      self.plot_area.create_text(
+        (10, 10 + i * self.legend_row_height), anchor='w',
+        state=tk.HIDDEN, tags=('legend',))
+      for i in range(max(1, self.plot_height // self.legend_row_height))
+    ]
+    self._legend_first = 0
+    self._legend_dirty = False
 
-    color_map = list(zip(plot_names, self.colors))
+    # Draw legend and lines, all series in one render
+    for plot_name, points in sorted(self._group(self.data).items()):
+      self._extend(plot_name, points)
+    self.request_render()
 
-    for plot_name, color in color_map:
-      dataxy = [
-        (row[x_field], row[y_field])
-        for row in data
-        if row[plot_by_field] == plot_name
-      ]
-      self._plot_line(dataxy, color)
+  def _group(self, rows):
+    """Group a Dataset (or a list of row dicts) by series, as arrays of
+    (x, y) points. A dict is taken as already grouped, as returned by
+    Dataset.group_by(plot_by_field)."""
+    if not len(rows):
+      return {}
+    if isinstance(rows, dict):
+      groups = rows
+    else:
+      if not isinstance(rows, Dataset):
+        rows = Dataset.from_records(rows)
+      groups = rows.group_by(self.plot_by_field)
+    return {
+      name: np.column_stack(part.select(self.x_field, self.y_field))
+      for name, part in groups.items()
+    }
 
-    self._draw_legend(color_map)
+  def append(self, rows):
+    """Add rows shaped like the constructor data to their series; pass
+    a cached group_by result to skip the grouping"""
+    for plot_name, points in self._group(rows).items():
+      self._extend(plot_name, points)
+    self.request_render()
 
+  def extend(self, series, points):
+    """Add (x, y) points, in x order, to a series and update its line"""
+    self._extend(series, points)
+    self.request_render()
 
-  def _plot_line(self, data, color):
-    """Plot a line described by data in the given color"""
+  def _extend(self, series, points):
+    """Add points to a series; the caller requests the render"""
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if not len(points):
+      return
+    new_series = series not in self._buffers
+    if new_series:
+      self._add_series(series, len(points))
+    buffer = self._buffers[series]
+    dropped = buffer.dropped
+    buffer.extend(points)
+    self._pyramids.pop(series, None)
+    if new_series or buffer.dropped != dropped:
+      self._stale[series] = None
+    elif self._stale.setdefault(series, []) is not None:
+      self._stale[series].append(points)
 
-    max_x = max([row[0] for row in data])
-    max_y = max([row[1] for row in data])
-    x_scale = self.plot_width / max_x
-    y_scale = self.plot_height / max_y
-    coords = [
-      (round(x * x_scale), self.plot_height - round(y * y_scale))
-      for x, y in data
-    ]
-    self.plot_area.create_line(
-      *coords, width=4, fill=color, smooth=True
+  def _add_series(self, name, size):
+    """Set up the buffer and color of a new series; its line and legend
+    row are made at the next render"""
+    index = len(self._names)
+    self._names.append(name)
+    self._colors[name] = self.series_color(index)
+    # tags that look like numbers are taken as item ids
+    self._tags[name] = ['line', f'series{index}']
+    self._buffers[name] = RingBuffer(max(self.capacity, size))
+    self._new_lines.append(name)
+    self._legend_dirty = True
+
+  @classmethod
+  def series_color(cls, index):
+    """Return the color of the index-th series
+
+    The named colors come first. After them hues step by the golden
+    ratio, with alternating saturation and value, so neighbouring
+    series stay apart however many there are.
+    """
+    if index < len(cls.colors):
+      return cls.colors[index]
+    index -= len(cls.colors)
+    red, green, blue = colorsys.hsv_to_rgb(
+      index * 0.618033988749895 % 1,
+      (0.55, 0.85)[index % 2],
+      (0.95, 0.75)[index // 2 % 2]
+    )
+    return '#{:02x}{:02x}{:02x}'.format(
+      *(round(c * 255) for c in (red, green, blue)))
+
+  def series_tag(self, name):
+    """Return the canvas tag of a series' line"""
+    return self._tags[name][1]
+
+  def _create_lines(self):
+    """Create the line items of the series added since the last call"""
+    for name in self._new_lines:
+      item = self.plot_area.create_line(
+        0, 0, 0, 0, width=self.line_width, fill=self._colors[name],
+        smooth=True, tags=self._tags[name],
+        state=tk.HIDDEN if name in self._hidden else tk.NORMAL
+      )
+      self._lines[name] = item
+      self._line_names[item] = name
+    self._new_lines.clear()
+    self.plot_area.tag_raise('legend')
+
+  def _pyramid(self, name):
+    if name not in self._pyramids:
+      data = self._buffers[name].view()
+      self._pyramids[name] = lod.Pyramid(data[:, 0], data[:, 1])
+    return self._pyramids[name]
+
+  def data_bounds(self):
+    """Return (x0, x1, y0, y1) spanning every series
+
+    Axes start at zero, as long as the data does, until a buffer wraps;
+    from then on x follows the oldest point still held. A chart with no
+    series yet spans the unit square.
+    """
+    if not self._buffers:
+      return 0.0, 1.0, 0.0, 1.0
+    return lod.bounds(
+      [self._pyramid(name) for name in self._buffers],
+      anchored=not any(b.dropped for b in self._buffers.values())
     )
 
-  def _draw_legend(self, color_map):
-    # determine legend
-    for i, (label, color) in enumerate(color_map):
+  def viewport(self):
+    """Return the (x0, x1, y0, y1) range in view"""
+    x0, x1, y0, y1 = self.data_bounds()
+    if self._zoom is not None:
+      x0, x1 = self._zoom
+    return x0, x1, y0, y1
+
+  @instrument.timed()
+  def render(self):
+    """Update the lines of every series that changed since last time
+
+    A change of viewport redraws every line. Otherwise only the changed
+    series are touched, and points added to a series drawn at full
+    resolution are appended to its line item.
+    """
+    stale, self._stale = self._stale, {}
+    if not self._buffers:
+      return
+    if self._new_lines:
+      self._create_lines()
+    if self._legend_dirty:
+      self._refresh_legend()
+    view = self.viewport()
+    if view != self._drawn_view:
+      self._drawn_view = view
+      stale = dict.fromkeys(self._lines)
+    for name, new_points in stale.items():
+      if new_points and len(self._buffers[name]) <= self.plot_width:
+        self.plot_area.insert(
+          self._lines[name], tk.END,
+          self._to_canvas(np.concatenate(new_points), view)
+        )
+      else:
+        self._draw_line(name, view)
+
+  def _draw_line(self, name, view):
+    """Replace the coords of a series' line for view
+
+    Each series is drawn from the level of its pyramid that fits about
+    one point per pixel column in the visible x range.
+    """
+    x, y, raw = self._pyramid(name).query(view[0], view[1], self.plot_width)
+    item = self._lines[name]
+    self.plot_area.coords(item, self._to_canvas(np.column_stack((x, y)), view))
+    # smoothing a min/max envelope only blurs it
+    self.plot_area.itemconfigure(item, smooth=raw)
+
+  def _to_canvas(self, points, view):
+    """Scale (x, y) points to plot area coordinates"""
+    x0, x1, y0, y1 = view
+    x_scale = self.plot_width / ((x1 - x0) or 1)
+    y_scale = self.plot_height / ((y1 - y0) or 1)
+    coords = np.column_stack((
+      np.rint((points[:, 0] - x0) * x_scale),
+      self.plot_height - np.rint((points[:, 1] - y0) * y_scale)
+    ))
+    if len(coords) == 1:
+      # a line item needs at least two points
+      coords = np.repeat(coords, 2, axis=0)
+    return coords.ravel().tolist()
+
+  ###############
+  # zoom & pan  #
+  ###############
+  def _x_at(self, pixel):
+    x0, x1 = self.viewport()[:2]
+    return x0 + (x1 - x0) * pixel / self.plot_width
+
+  def zoom(self, factor, center=None):
+    """Scale the visible x range by factor around center, which
+    defaults to the middle of the view"""
+    if not self._buffers:
+      return
+    x0, x1 = self.viewport()[:2]
+    if center is None:
+      center = (x0 + x1) / 2
+    self._zoom = (
+      center - (center - x0) * factor, center + (x1 - center) * factor
+    )
+    self.request_render()
+
+  def pan(self, dx):
+    """Shift the visible x range by dx data units"""
+    if not self._buffers:
+      return
+    x0, x1 = self.viewport()[:2]
+    self._zoom = (x0 + dx, x1 + dx)
+    self.request_render()
+
+  def reset_view(self, *_):
+    """Go back to showing all of the data"""
+    self._zoom = None
+    self.request_render()
+
+  def _on_wheel(self, event):
+    if self._legend_row_at_pointer() is not None:
+      self._on_legend_wheel(event)
+      return
+    if not self._buffers:
+      return
+    factor = 0.8 if event.num == 4 or event.delta > 0 else 1.25
+    self.zoom(factor, self._x_at(event.x))
+
+  def _on_press(self, event):
+    row = self._legend_row_at_pointer()
+    if row is not None:
+      self._drag_x = None
+      self._on_legend_click(row)
+      return
+    self._drag_x = event.x
+
+  def _on_drag(self, event):
+    if self._drag_x is None or not self._buffers:
+      return
+    x0, x1 = self.viewport()[:2]
+    self.pan((self._drag_x - event.x) * (x1 - x0) / self.plot_width)
+    self._drag_x = event.x
+
+  def set_pending(self, pending, text='Loading...'):
+    """Show or clear a notice while the chart data is on its way"""
+    self.plot_area.delete('pending')
+    if pending:
       self.plot_area.create_text(
-        (10, 10 + (i * 20)),
-        text=label, fill=color, anchor='w'
+        (self.plot_width // 2, self.plot_height // 2),
+        text=text, fill='white', tags=('pending',)
+      )
+
+  ###############
+  # series tags #
+  ###############
+  def _names_tagged(self, tag):
+    """Return the series whose lines carry tag"""
+    self._create_lines()
+    return [
+      self._line_names[item] for item in self.plot_area.find_withtag(tag)
+      if item in self._line_names
+    ]
+
+  def tag_series(self, tag, names):
+    """Add tag to the lines of names, to restyle or hide them together"""
+    for name in names:
+      self._tags[name].append(tag)
+      if name in self._lines:
+        self.plot_area.addtag_withtag(tag, self._lines[name])
+
+  def restyle(self, tag='line', **options):
+    """Configure every line with tag at once, e.g. width or dash"""
+    names = self._names_tagged(tag)
+    self.plot_area.itemconfigure(tag, **options)
+    if 'fill' in options:
+      for name in names:
+        self._colors[name] = options['fill']
+      self._refresh_legend()
+
+  def set_visible(self, tag, visible=True):
+    """Show or hide every line with tag, by item state"""
+    names = self._names_tagged(tag)
+    self.plot_area.itemconfigure(
+      tag, state=tk.NORMAL if visible else tk.HIDDEN)
+    if visible:
+      self._hidden.difference_update(names)
+    else:
+      self._hidden.update(names)
+    self._refresh_legend()
+
+  def toggle(self, name):
+    """Hide a shown series or show a hidden one"""
+    self.set_visible(self.series_tag(name), name in self._hidden)
+
+  ##########
+  # legend #
+  ##########
+  def _refresh_legend(self):
+    """Rebind the pooled legend rows to the series in view"""
+    self._legend_dirty = False
+    pool = self._legend_rows
+    self._legend_first = max(
+      0, min(self._legend_first, len(self._names) - len(pool)))
+    visible = self._names[self._legend_first:self._legend_first + len(pool)]
+    for item, name in itertools.zip_longest(pool, visible):
+      if name is None:
+        self.plot_area.itemconfigure(item, text='', state=tk.HIDDEN)
+      else:
+        self.plot_area.itemconfigure(
+          item, text=name, state=tk.NORMAL,
+          fill=self.hidden_color if name in self._hidden
+          else self._colors[name]
+        )
+
+  def _legend_row_at_pointer(self):
+    """Return the pool index of the legend row under the mouse, or None"""
+    for item in self.plot_area.find_withtag('current'):
+      if item in self._legend_rows:
+        return self._legend_rows.index(item)
+    return None
+
+  def _on_legend_wheel(self, event):
+    step = -1 if event.num == 4 or event.delta > 0 else 1
+    self._legend_first += step * 3
+    self._refresh_legend()
+
+  def _on_legend_click(self, row):
+    row += self._legend_first
+    if row < len(self._names):
+      self.toggle(self._names[row])
+
+
+class TableView(tk.Frame):
+  """A table that only renders the rows in view
+
+  Rows come from a provider with the Dataset interface: len(), a
+  `fields` mapping and column arrays by field name. The Treeview holds
+  one item per visible row, whose values are swapped as the view
+  scrolls, so browsing cost does not depend on the number of rows.
+  Sorting and filtering only rebuild an index array of row positions.
+  The selection follows its data row, not the reused item; read the
+  row's position in the provider from `selected_row`.
+  """
+
+  def __init__(self, parent, provider, visible_rows=20, **kwargs):
+    super().__init__(parent, **kwargs)
+    if not isinstance(provider, Dataset):
+      provider = Dataset.from_records(provider)
+    self.provider = provider
+    self.columns = list(provider.fields)
+    self.visible_rows = visible_rows
+    self._sort_orders = {}  # column -> argsort of that column
+    self._sort = None       # (column, descending) or None
+    self._mask = None       # boolean filter over provider rows
+    self._index = np.arange(len(provider))
+    self._first = 0
+    self.selected_row = None  # provider row of the selection, or None
+
+    self.columnconfigure(0, weight=1)
+    self.rowconfigure(0, weight=1)
+    self.tree = ttk.Treeview(
+      self, columns=self.columns, show='headings',
+      height=visible_rows, selectmode='browse'
+    )
+    for column in self.columns:
+      self.tree.heading(
+        column, text=column,
+        command=lambda column=column: self.sort_by(column)
       )
+    self.tree.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
+    self.scrollbar = ttk.Scrollbar(
+      self, orient=tk.VERTICAL, command=self._yview
+    )
+    self.scrollbar.grid(row=0, column=1, sticky=tk.N + tk.S)
+
+    # one item per visible row, reused as the view scrolls
+    for i in range(visible_rows):
+      self.tree.insert('', tk.END, iid=str(i))
+    for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+      self.tree.bind(sequence, self._on_wheel)
+    self.tree.bind('<<TreeviewSelect>>', self._on_select)
+    self._refresh()
+
+  def __len__(self):
+    """Number of rows that pass the filter"""
+    return len(self._index)
+
+  def sort_by(self, column, descending=None):
+    """Sort the rows by column; repeating a column flips the order"""
+    if descending is None:
+      descending = self._sort == (column, False)
+    self._sort = (column, descending)
+    self._rebuild_index()
+
+  def set_filter(self, mask=None, **equals):
+    """Show only the rows where mask is true and every field in equals
+    holds the given value; no arguments clears the filter"""
+    if mask is None and not equals:
+      self._mask = None
+    else:
+      self._mask = self.provider.mask(**equals)
+      if mask is not None:
+        self._mask &= np.array(mask, dtype=bool)
+    self._rebuild_index()
+
+  def _rebuild_index(self):
+    if self._sort is None:
+      index = np.arange(len(self.provider))
+    else:
+      column, descending = self._sort
+      if column not in self._sort_orders:
+        self._sort_orders[column] = self.provider.argsort(column)
+      index = self._sort_orders[column]
+      if descending:
+        index = index[::-1]
+    if self._mask is not None:
+      index = index[self._mask[index]]
+    self._index = index
+    self._first = 0
+    self._refresh()
 
+  def _on_wheel(self, event):
+    step = -1 if event.num == 4 or event.delta > 0 else 1
+    self._scroll_to(self._first + step * 3)
+    return 'break'
 
-class YieldChartView(tk.Frame):
+  def _yview(self, *args):
+    """Scrollbar command: ('moveto', fraction) or ('scroll', n, what)"""
+    if args[0] == 'moveto':
+      self._scroll_to(round(float(args[1]) * len(self._index)))
+    elif args[0] == 'scroll':
+      step = int(args[1])
+      if args[2] == 'pages':
+        step *= self.visible_rows
+      self._scroll_to(self._first + step)
 
-  def __init__(self, parent, x_axis, y_axis, title):
+  def _on_select(self, _):
+    # an empty selection is ours, for a row out of view; keep the row
+    for item in self.tree.selection():
+      position = self._first + int(item)
+      if position < len(self._index):
+        self.selected_row = int(self._index[position])
+
+  def _scroll_to(self, first):
+    first = max(0, min(first, len(self._index) - self.visible_rows))
+    if first != self._first:
+      self._first = first
+      self._refresh()
+
+  def _refresh(self):
+    """Fill the visible items from the rows now in view"""
+    rows = self._index[self._first:self._first + self.visible_rows]
+    columns = [
+      self.provider.values(column, rows).tolist() for column in self.columns
+    ]
+    for i, values in enumerate(zip(*columns)):
+      self.tree.item(str(i), values=values)
+    for i in range(len(rows), self.visible_rows):
+      self.tree.item(str(i), values=())
+    # move the selection to the item now showing the selected row
+    selection = ()
+    if self.selected_row is not None:
+      shown = np.flatnonzero(rows == self.selected_row)
+      selection = tuple(str(i) for i in shown[:1])
+    if self.tree.selection() != selection:
+      self.tree.selection_set(selection)
+
+    total = len(self._index) or 1
+    self.scrollbar.set(
+      self._first / total,
+      min(1, (self._first + self.visible_rows) / total)
+    )
+
+
+class YieldChartView(Renderable, tk.Frame):
+  """A matplotlib scatter plot with one collection per label
+
+  Drawing a label that is already plotted swaps the data of its
+  collection in place. With `blit=True` those updates are painted over
+  a cached background instead of redrawing the whole figure. Pass a
+  RenderScheduler as `scheduler` to batch updates into frames.
+
+  Hovering a point shows its label, x, y and size in a tooltip, and
+  clicking it selects it and fires <<PointSelected>>; read the point
+  from `selection`. Repainting on hover is cheap with blit=True.
+  Lookups go through a GridIndex per label, built on the first lookup
+  after the label's data changed, and mouse motion is handled at most
+  once per frame.
+  """
+
+  figsize = (6, 4)
+  dpi = 100
+  alpha = 0.5
+  # how close, in pixels, the mouse must be to pick a point
+  pick_radius = 8
+  # motion lookups per second when no scheduler sets the frame rate
+  hover_fps = 30
+
+  def __init__(
+    self, parent, x_axis, y_axis, title, blit=False, scheduler=None,
+    series_label='label', size_label='size'
+  ):
     super().__init__(parent)
-    self.figure = Figure(figsize=(6, 4), dpi=100)
+    Figure, FigureCanvasTkAgg, NavigationToolbar2Tk = _matplotlib()
+    self.figure = Figure(figsize=self.figsize, dpi=self.dpi)
     self.canvas_tkagg = FigureCanvasTkAgg(self.figure, master=self)
+    # draw_idle() only schedules; time the Agg draw it runs later
+    self.canvas_tkagg.draw = instrument.timed('YieldChartView.draw')(
+      self.canvas_tkagg.draw)
     canvas = self.canvas_tkagg.get_tk_widget()
     canvas.pack(fill='both', expand=True)
     self.toolbar = NavigationToolbar2Tk(self.canvas_tkagg, self)
-    self.axes = self.figure.add_subplot(1, 1, 1)
-    self.axes.set_xlabel(x_axis)
-    self.axes.set_ylabel(y_axis)
-    self.axes.set_title(title)
+    self.axes = self.setup_axes(self.figure, x_axis, y_axis, title)
     self.scatters = list()
     self.scatter_labels = list()
 
+    self.blit = blit
+    self._collections = {}  # label -> PathCollection
+    self._background = None
+    self.canvas_tkagg.mpl_connect('draw_event', self._on_draw)
+    self._pending_text = None
+    # True when the next render must redraw the whole figure
+    self._full_redraw = False
+    if scheduler is not None:
+      scheduler.register(self)
+
+    # picking
+    # names of the fields shown for a point
+    self.labels = (series_label, x_axis, y_axis, size_label)
+    self._points = {}   # label -> (x, y, size) arrays
+    self._indexes = {}  # label -> GridIndex, dropped when data changes
+    self._mouse = None  # last (x, y) seen in pixels, or None
+    self._hover_id = None
+    self._hovered = None
+    self.selection = None  # dict for the selected point, or None
+    self.tooltip = self.axes.annotate(
+      '', xy=(0, 0), xytext=(12, 12), textcoords='offset points',
+      bbox={'boxstyle': 'round', 'fc': 'white', 'alpha': 0.9},
+      visible=False, animated=blit
+    )
+    self.marker, = self.axes.plot(
+      [], [], 'o', markersize=12, markerfacecolor='none',
+      markeredgecolor='black', animated=blit
+    )
+    self.canvas_tkagg.mpl_connect('motion_notify_event', self._on_motion)
+    self.canvas_tkagg.mpl_connect('button_press_event', self._on_click)
+
   def draw_scatter(self, data, color, label):
+    """Draw a sequence of (x, y, size) points"""
     x, y, size = zip(*data)
-    scaled_size = [(s ** 2)//2 for s in size]
-    scatter = self.axes.scatter(
-      x, y, scaled_size,
-      c=color, label=label, alpha=0.5
+    self.draw_columns(x, y, size, color, label)
+
+  @staticmethod
+  def setup_axes(figure, x_axis, y_axis, title):
+    """Add the labelled axes to a figure; shared with headless export"""
+    axes = figure.add_subplot(1, 1, 1)
+    axes.set_xlabel(x_axis)
+    axes.set_ylabel(y_axis)
+    axes.set_title(title)
+    return axes
+
+  @staticmethod
+  def scaled_size(size):
+    """Marker area for each yield value"""
+    return np.asarray(size) ** 2 // 2
+
+  def draw_columns(self, x, y, size, color, label):
+    """Draw points given as x, y and size arrays, e.g. Dataset columns"""
+    self._points[label] = tuple(
+      np.asarray(column, dtype=float) for column in (x, y, size))
+    self._indexes.pop(label, None)
+    self._hovered = None
+    scaled_size = self.scaled_size(size)
+    scatter = self._collections.get(label)
+    if scatter is None:
+      scatter = self.axes.scatter(
+        x, y, scaled_size,
+        c=color, label=label, alpha=self.alpha, animated=self.blit
+      )
+      self._collections[label] = scatter
+      self.scatters.append(scatter)
+      self.scatter_labels.append(label)
+      # the label set changed, so the legend and background must too
+      self.axes.legend(self.scatters, self.scatter_labels)
+      self._full_redraw = True
+      self.request_render()
+      return
+
+    offsets = np.column_stack((x, y))
+    scatter.set_offsets(offsets)
+    scatter.set_sizes(scaled_size)
+    scatter.set_facecolor(color)
+    if self._fit(offsets):
+      self._full_redraw = True
+    self.request_render()
+
+  def set_pending(self, pending, text='Loading...'):
+    """Show or clear a notice while the chart data is on its way"""
+    if self._pending_text is not None:
+      self._pending_text.remove()
+      self._pending_text = None
+    if pending:
+      self._pending_text = self.axes.text(
+        0.5, 0.5, text, transform=self.axes.transAxes,
+        ha='center', va='center'
+      )
+    self._full_redraw = True
+    self.request_render()
+
+  def _fit(self, offsets):
+    """Grow the view limits to hold offsets; True if they moved"""
+    if not len(offsets):
+      return False
+    (x0, x1), (y0, y1) = self.axes.get_xlim(), self.axes.get_ylim()
+    low, high = offsets.min(axis=0), offsets.max(axis=0)
+    if low[0] >= x0 and high[0] <= x1 and low[1] >= y0 and high[1] <= y1:
+      return False
+    self.axes.update_datalim(offsets)
+    self.axes.autoscale_view()
+    return True
+
+  @instrument.timed()
+  def render(self):
+    """Repaint the scatters, blitting when a background is cached"""
+    full, self._full_redraw = self._full_redraw, False
+    if full or not self.blit or self._background is None:
+      self.canvas_tkagg.draw_idle()
+      return
+    self.canvas_tkagg.restore_region(self._background)
+    self._draw_animated()
+    self.canvas_tkagg.blit(self.axes.bbox)
+
+  def _draw_animated(self):
+    for artist in (*self.scatters, self.marker, self.tooltip):
+      self.axes.draw_artist(artist)
+
+  def _on_draw(self, event):
+    """Cache the background after each full draw when blitting"""
+    if not self.blit:
+      return
+    self._background = self.canvas_tkagg.copy_from_bbox(self.axes.bbox)
+    # animated artists are skipped by a full draw; paint them on top
+    self._draw_animated()
+
+  def pick(self, px, py):
+    """Return (label, index) of the point nearest to pixel (px, py),
+    or None when no point is within pick_radius"""
+    inverse = self.axes.transData.inverted()
+    (x, y), (x1, y1) = inverse.transform(
+      [(px, py), (px + self.pick_radius, py + self.pick_radius)])
+    rx, ry = abs(x1 - x), abs(y1 - y)
+    best, best_distance = None, np.inf
+    for label, (xs, ys, _) in self._points.items():
+      index = self._indexes.get(label)
+      if index is None:
+        index = self._indexes[label] = GridIndex(xs, ys)
+      i, distance = index.nearest(x, y, rx, ry)
+      if distance < best_distance:
+        best, best_distance = (label, i), distance
+    return best
+
+  def point(self, label, index):
+    """Return a drawn point as a dict keyed by `labels`"""
+    values = (label, *(column[index] for column in self._points[label]))
+    return dict(zip(self.labels, values))
+
+  @staticmethod
+  def describe(point, sep='\n'):
+    """Format a point dict as 'name: value' lines"""
+    return sep.join(
+      f'{key}: {value:.2f}' if isinstance(value, float) else f'{key}: {value}'
+      for key, value in point.items()
     )
-    self.scatters.append(scatter)
-    self.scatter_labels.append(label)
-    self.axes.legend(self.scatters, self.scatter_labels)
\ No newline at end of file
+
+  def _on_motion(self, event):
+    """Remember the mouse; the lookup waits for the next frame"""
+    self._mouse = (event.x, event.y) if event.inaxes is self.axes else None
+    if self._hover_id is None:
+      fps = self.scheduler.max_fps if self.scheduler else self.hover_fps
+      self._hover_id = self.after(max(1, 1000 // fps), self._update_hover)
+
+  def _update_hover(self):
+    self._hover_id = None
+    hit = self.pick(*self._mouse) if self._mouse else None
+    if hit == self._hovered:
+      return
+    self._hovered = hit
+    if hit is None:
+      self.tooltip.set_visible(False)
+    else:
+      point = self.point(*hit)
+      _, x_label, y_label, _ = self.labels
+      self.tooltip.xy = (point[x_label], point[y_label])
+      self.tooltip.set_text(self.describe(point))
+      self.tooltip.set_visible(True)
+    self.request_render()
+
+  def _on_click(self, event):
+    """Select the point under the mouse, or clear the selection"""
+    if event.inaxes is not self.axes or event.button != 1:
+      return
+    hit = self.pick(event.x, event.y)
+    if hit is None:
+      self.selection = None
+      self.marker.set_data([], [])
+    else:
+      self.selection = self.point(*hit)
+      _, x_label, y_label, _ = self.labels
+      self.marker.set_data(
+        [self.selection[x_label]], [self.selection[y_label]])
+    self.request_render()
+    self.event_generate('<<PointSelected>>')
+
+  def destroy(self):
+    if self._hover_id is not None:
+      self.after_cancel(self._hover_id)
+      self._hover_id = None
+    super().destroy()
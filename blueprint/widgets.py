@@ -2,12 +2,83 @@
 blueprint/widgets.py: file containing the widgets of our app
 """
 
+import contextlib
+import functools
 import tkinter as tk
 from tkinter import ttk
 
+from . import instrument
 from .constants import FieldTypes as FT
 
 
+def _common_prefix(a, b):
+    """Return the length of the common prefix of two strings.
+
+    Binary search over slice comparisons keeps the character scanning
+    in C, which matters for multi-megabyte texts.
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _common_suffix(a, b, limit):
+    """Return the length of the common suffix of two strings, at most limit"""
+    low, high = 0, limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+# (widget, callback name) -> bound callback, while a batch is open
+_pending = None
+
+
+@contextlib.contextmanager
+def batch():
+    """Defer the trace callbacks marked @deferred until the block ends.
+
+    Each widget's deferred callback then runs once, against the final
+    values of its variables, however many writes the block made.
+    Nested batches are folded into the outermost one.
+    """
+    global _pending
+    if _pending is not None:
+        yield
+        return
+    _pending = {}
+    try:
+        yield
+    finally:
+        pending, _pending = _pending, None
+        for callback in pending.values():
+            callback()
+
+
+def deferred(method):
+    """Mark a trace callback as one that batch() may postpone.
+
+    The callback must only depend on the current state of its widget,
+    not on the trace arguments, since those are dropped.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        if _pending is not None:
+            _pending[(self, method.__name__)] = functools.partial(method, self)
+            return None
+        return method(self, *args)
+    return wrapper
+
+
 class BoundText(tk.Text):
     """A Text widget with a bound variable.
 
@@ -21,29 +92,149 @@ class BoundText(tk.Text):
        Override initializer to allow a control variable to be passed in,
        use textvariable argument to pass in a StringVar object
 
+       Edits in the widget are pushed to the variable once typing
+       pauses for flush_delay ms, so a burst of keystrokes costs one
+       copy of the text; sync(), or the focus leaving the widget, pushes
+       them at once. Writes to the variable replace only the region
+       that changed. Inside widgets.batch() only the last write is applied.
+       A disabled (read-only) BoundText still follows its variable, and
+       append() streams text in without copying it to the variable per
+       chunk; call sync() once the stream ends.
+
     """
 
+    # ms without edits before they are pushed to the variable
+    flush_delay = 250
+
     def __init__(self, *args, textvariable=None, **kwargs):
 
         super().__init__(*args, **kwargs)
         self._variable = textvariable
+        # text as last synced between widget and variable
+        self._text = ''
+        # after id of a pending push to the variable
+        self._flush_id = None
+        # True while we write the variable ourselves, so the trace
+        # doesn't echo the text back into the widget
+        self._syncing = False
+        # True when append() added text the variable doesn't have yet
+        self._appended = False
+        # Tcl 8.6 counts a character outside the BMP as two in indices
+        self._surrogates = self.tk.call('string', 'length', '\U0001F600') == 2
         if self._variable:
             # insert any default value
-            self.insert('1.0', self._variable.get())
+            self._text = self._variable.get()
+            with self._editable():
+                self.insert('1.0', self._text)
+            self.edit_modified(False)
             self._variable.trace_add('write', self._set_content)
             self.bind('<<Modified>>', self._set_var)
+            self.bind('<FocusOut>', lambda _: self.sync(), add='+')
 
     def _set_var(self, *_):
+        """Schedule setting the variable once the edits pause"""
+        if not self.edit_modified():
+            return
+        # <<Modified>> only fires again once the flag is cleared; clear
+        # it so the next edit restarts the wait
+        self.edit_modified(False)
+        if self._flush_id is not None:
+            self.after_cancel(self._flush_id)
+        self._flush_id = self.after(self.flush_delay, self._flush)
+
+    @instrument.timed()
+    def _flush(self):
         """Set the variable to the text contents"""
-        if self.edit_modified():
-            content = self.get('1.0', 'end-1chars')
+        self._flush_id = None
+        self._appended = False
+        content = self.get('1.0', 'end-1chars')
+        self.edit_modified(False)
+        if content == self._text:
+            return
+        self._text = content
+        self._syncing = True
+        try:
             self._variable.set(content)
-            self.edit_modified(False)
+        finally:
+            self._syncing = False
 
+    @deferred
+    @instrument.timed()
     def _set_content(self, *_):
         """Set the text contents to the variable"""
-        self.delete('1.0', tk.END)
-        self.insert('1.0', self._variable.get())
+        if self._syncing:
+            return
+        if self._flush_id is not None or self._appended:
+            # the variable wins over edits that were not pushed yet
+            if self._flush_id is not None:
+                self.after_cancel(self._flush_id)
+                self._flush_id = None
+            self._appended = False
+            current = self.get('1.0', 'end-1chars')
+        else:
+            current = self._text
+        content = self._variable.get()
+        self._text = content
+        if content == current:
+            return
+
+        # replace only what lies between the common prefix and suffix
+        start = _common_prefix(current, content)
+        end = _common_suffix(
+            current, content, min(len(current), len(content)) - start)
+        first = f'1.0 + {self._tk_offset(current, start)} chars'
+        last = f'1.0 + {self._tk_offset(current, len(current) - end)} chars'
+        with self._editable():
+            self.delete(first, last)
+            self.insert(first, content[start:len(content) - end])
+        self.edit_modified(False)
+
+    def _tk_offset(self, text, position):
+        """Turn an offset into text into the count Tk indices use"""
+        if not self._surrogates or text.isascii():
+            return position
+        # characters past the BMP are two UTF-16 units, as in Tk
+        return len(text[:position].encode('utf-16-le')) // 2
+
+    @contextlib.contextmanager
+    def _editable(self):
+        """Let the block edit the text even if the widget is disabled"""
+        state = str(self.cget('state'))
+        if state == tk.DISABLED:
+            self.configure(state=tk.NORMAL)
+        try:
+            yield
+        finally:
+            if state == tk.DISABLED:
+                self.configure(state=state)
+
+    def append(self, text):
+        """Add text at the end, e.g. a chunk of streamed output.
+
+        The variable is left alone until sync(), so streaming n chunks
+        doesn't copy the whole text n times.
+        """
+        with self._editable():
+            self.insert('end-1c', text)
+        self._appended = True
+        # don't let <<Modified>> schedule a flush for it
+        self.edit_modified(False)
+
+    def sync(self):
+        """Push edits and appended text to the variable now"""
+        if not self._variable:
+            return
+        if self._flush_id is not None:
+            self.after_cancel(self._flush_id)
+        elif not (self._appended or self.edit_modified()):
+            return  # nothing the variable doesn't have
+        self._flush()
+
+    def destroy(self):
+        if self._flush_id is not None:
+            self.after_cancel(self._flush_id)
+            self._flush_id = None
+        super().destroy()
 
 
 class LabelInput(tk.Frame):
@@ -170,6 +361,8 @@ class LabelInput(tk.Frame):
             self.disable_var = disable_var
             self.disable_var.trace_add('write', self._check_disable)
 
+    @deferred
+    @instrument.timed()
     def _check_disable(self, *_):
         if not hasattr(self, 'disable_var'):
             return